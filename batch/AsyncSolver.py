@@ -0,0 +1,154 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import gurobipy as gp
+
+from model.Model import Model
+from read.InstanceRegistry import InstanceRegistry
+
+
+class SolveJob:
+    """
+    一次建模+求解任务, 在线程池的工作线程中执行
+    取消时设置标记并终止求解; 求解尚未开始时由回调在第一次调用时终止, 不会错过取消
+    """
+    def __init__(self, instance, model_class, time_limit, threads, warm_start, verbose):
+        self.instance = instance  # Instance或算例名/路径, 后者在工作线程中加载
+        self.name = InstanceRegistry.name(instance) if isinstance(instance, str) else None
+        self.model_class = model_class
+        self.time_limit = time_limit
+        self.threads = threads
+        self.warm_start = warm_start
+        self.verbose = verbose
+        self.model = None  # 建模完成后才有
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        model = self.model
+        if model is not None:
+            model.model.terminate()
+
+    def check_cancelled(self, model, where):
+        """
+        求解回调: 已取消时终止求解
+        """
+        if self.cancelled:
+            model.terminate()
+
+    def run(self, env):
+        """
+        :param env: 工作线程独占的Gurobi环境
+        :return: 结果字典, 与batch.BatchSolver.solve_instance的格式一致, 取消时status为GRB.INTERRUPTED
+        """
+        if self.cancelled:
+            return None
+        model = self.model_class.from_instance(self.instance, env)
+        model.model.setParam('OutputFlag', 1 if self.verbose else 0)
+        model.build_model()
+        if self.warm_start:
+            model.warm_start()
+        model.callbacks.append(self.check_cancelled)
+        self.model = model
+        solution = model.optimize(self.time_limit, threads=self.threads)
+
+        gurobi_model = model.model
+        return {'instance': self.name,
+                'status': gurobi_model.status,
+                **model.objective_summary(),
+                'runtime': gurobi_model.Runtime,
+                'routes': solution}
+
+
+class AsyncSolver:
+    """
+    面向asyncio的求解接口
+    建模与求解在有界线程池中执行, 不阻塞事件循环(Gurobi在optimize期间释放GIL);
+    每个请求可以单独设置时间限制, 取消等待中的协程会终止对应的optimize
+    """
+    def __init__(self, data_path='data', workers=4, threads=1, model_class=Model,
+                 time_limit=None, warm_start=True, verbose=False):
+        """
+        :param data_path: 按算例名请求时使用的算例目录
+        :param workers: 同时求解的最大请求数, 其余请求排队等待
+        :param threads: 每个请求中Gurobi使用的线程数
+        :param model_class: 模型类, Model或TwoIndexModel
+        :param time_limit: 默认的单个请求时间限制, 单位为秒
+        :param warm_start: 是否使用插入启发式构造MIP初始解
+        :param verbose: 是否输出求解日志
+        """
+        self.data_path = data_path
+        self.threads = threads
+        self.model_class = model_class
+        self.time_limit = time_limit
+        self.warm_start = warm_start
+        self.verbose = verbose
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vrptw')
+        self.local = threading.local()  # 每个工作线程的Gurobi环境
+        self.envs = []  # 已创建的环境, 关闭时释放
+        self.envs_lock = threading.Lock()
+
+    def env(self):
+        """
+        当前工作线程的Gurobi环境, Gurobi环境不是线程安全的, 每个线程创建一个并复用
+        """
+        env = getattr(self.local, 'env', None)
+        if env is None:
+            env = gp.Env(empty=True)
+            env.setParam('OutputFlag', 1 if self.verbose else 0)
+            env.start()
+            self.local.env = env
+            with self.envs_lock:
+                self.envs.append(env)
+        return env
+
+    def run(self, job):
+        """
+        在工作线程中执行: 按算例名加载算例后求解
+        """
+        if isinstance(job.instance, str):
+            job.instance = InstanceRegistry.shared(self.data_path).get(job.instance)
+        return job.run(self.env())
+
+    async def solve(self, instance, time_limit=None):
+        """
+        提交一个建模+求解请求并等待结果
+        :param instance: Instance或算例名/路径
+        :param time_limit: 本请求的时间限制, 单位为秒, 默认使用构造时的time_limit
+        :return: 结果字典; 协程被取消时终止求解并抛出asyncio.CancelledError
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        job = SolveJob(instance, self.model_class, time_limit, self.threads, self.warm_start, self.verbose)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, self.run, job)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # 排队中的请求直接不再执行, 运行中的请求终止optimize后释放工作线程
+            job.cancel()
+            raise
+
+    async def solve_all(self, instances, time_limit=None):
+        """
+        并发提交多个请求
+        :return: 结果列表, 顺序与instances一致
+        """
+        return await asyncio.gather(*(self.solve(instance, time_limit) for instance in instances))
+
+    def close(self):
+        """
+        等待运行中的请求结束并释放线程池与Gurobi环境
+        """
+        self.executor.shutdown(wait=True)
+        with self.envs_lock:
+            for env in self.envs:
+                env.dispose()
+            self.envs.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,107 @@
+import csv
+import json
+import multiprocessing as mp
+import os
+
+from draw.DrawMap import DrawMap
+from model.Model import Model
+from read.Read import Read
+
+
+def solve_instance(task):
+    """
+    在工作进程中求解单个算例, 必须是模块级函数以便被进程池序列化
+    :param task: (算例路径, 模型类, 时间限制, 每个进程的线程数, 是否使用启发式初始解, 是否输出求解日志)
+    :return: 结果字典
+    """
+    path, model_class, time_limit, threads, warm_start, verbose = task
+
+    model = model_class.from_instance(Read.load_instance(path))
+    model.model.setParam('OutputFlag', 1 if verbose else 0)
+    model.build_model()
+    if warm_start:
+        model.warm_start()
+    solution = model.optimize(time_limit, threads=threads)
+
+    gurobi_model = model.model
+    return {'instance': os.path.splitext(os.path.basename(path))[0],
+            'path': path,
+            'status': gurobi_model.status,
+            **model.objective_summary(),
+            'runtime': gurobi_model.Runtime,
+            'routes': solution}
+
+
+class BatchSolver:
+    """
+    使用进程池并行求解整个算例目录
+    """
+    def __init__(self, data_path, processes=None, threads=None, time_limit=300,
+                 model_class=Model, warm_start=True, verbose=False):
+        """
+        :param data_path: 算例目录
+        :param processes: 进程数, 默认为CPU核数
+        :param threads: 每个进程中Gurobi使用的线程数, 默认为 CPU核数 // 进程数, 避免超额占用CPU
+        :param time_limit: 每个算例的求解时间限制, 单位为秒
+        :param model_class: 模型类, Model或TwoIndexModel
+        :param warm_start: 是否使用插入启发式构造MIP初始解
+        :param verbose: 是否输出求解日志
+        """
+        cpu_count = os.cpu_count() or 1
+        self.data_path = data_path
+        self.processes = processes or cpu_count
+        self.threads = threads or max(1, cpu_count // self.processes)
+        self.time_limit = time_limit
+        self.model_class = model_class
+        self.warm_start = warm_start
+        self.verbose = verbose
+        self.results = []  # 结果表, 每个算例一行
+
+    def solve(self, instance_paths=None):
+        """
+        并行求解所有算例
+        :param instance_paths: 算例路径列表, 默认为目录下的所有文件
+        :return: 按算例名排序的结果表
+        """
+        if instance_paths is None:
+            instance_paths = Read(self.data_path).file_paths
+
+        tasks = [(path, self.model_class, self.time_limit, self.threads, self.warm_start, self.verbose)
+                 for path in instance_paths]
+
+        self.results = []
+        with mp.Pool(processes=self.processes) as pool:
+            for result in pool.imap_unordered(solve_instance, tasks):
+                print(f"Solved instance: {result['instance']}, objective: {result['objective']}, "
+                      f"gap: {result['gap']}, runtime: {result['runtime']:.2f}s")
+                self.results.append(result)
+
+        self.results.sort(key=lambda r: r['instance'])
+        return self.results
+
+    def save_csv(self, filename):
+        """
+        将结果表保存为CSV文件, 路线以JSON字符串保存
+        :param filename: 文件名
+        :return:
+        """
+        fields = ['instance', 'path', 'status', 'objective', 'bound', 'gap', 'runtime', 'routes']
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            for result in self.results:
+                row = dict(result)
+                row['routes'] = json.dumps(result['routes'])
+                writer.writerow(row)
+
+    def export_figures(self, directory, dpi=300, labels=True):
+        """
+        无界面批量导出所有有解算例的路线图, 每个算例保存为<算例名>.png
+        :param directory: 输出目录
+        :param dpi: 分辨率
+        :param labels: 是否添加客户编号标签
+        :return: 导出的文件路径列表
+        """
+        items = ((Read.load_instance(result['path']), result['routes'], result['instance'])
+                 for result in self.results if result['routes'])
+        return DrawMap.export_all(items, directory, dpi, labels)
@@ -0,0 +1,215 @@
+import csv
+import json
+import multiprocessing as mp
+import os
+import time
+
+from evaluate.Evaluator import Evaluator
+from model.Model import Model
+from model.Profiler import peak_rss
+from read.Instance import Instance
+from read.Parser import Parser
+from read.Read import Read
+
+BEST_KNOWN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'best_known.csv')
+
+
+def benchmark_instance(task):
+    """
+    在独立的工作进程中对单个算例计时, 每个进程只处理一个算例, 峰值内存互不影响
+    :param task: (算例路径, 模型类, 时间限制, 线程数, 建模参数)
+    :return: 结果字典
+    """
+    path, model_class, time_limit, threads, build_options = task
+
+    # 解析, 不使用缓存以测量文本解析时间
+    start = time.perf_counter()
+    vehicle_data, columns = Parser(use_cache=False).load(path)
+    parse_time = time.perf_counter() - start
+
+    # 距离矩阵
+    start = time.perf_counter()
+    Instance.distance_matrix(columns['x'], columns['y'])
+    distance_time = time.perf_counter() - start
+
+    # 算例(距离矩阵, 可行弧)
+    start = time.perf_counter()
+    instance = Instance.from_arrays(vehicle_data, columns)
+    instance_time = time.perf_counter() - start
+
+    # 建模
+    model = model_class.from_instance(instance)
+    model.model.setParam('OutputFlag', 0)
+    start = time.perf_counter()
+    model.build_model(**build_options)
+    model.model.update()
+    build_time = time.perf_counter() - start
+
+    # 求解
+    start = time.perf_counter()
+    model.optimize(time_limit, threads=threads)
+    solve_time = time.perf_counter() - start
+
+    # 提取解
+    gurobi_model = model.model
+    has_solution = gurobi_model.SolCount > 0
+    start = time.perf_counter()
+    routes = model.extract_routes() if has_solution else {}
+    extract_time = time.perf_counter() - start
+
+    # 独立校验MIP的解
+    verified = Evaluator(instance).evaluate([route['route'] for route in routes.values()]) if has_solution else None
+
+    return {'instance': os.path.splitext(os.path.basename(path))[0],
+            'customers': instance.n - 1,
+            'parse_time': parse_time,
+            'distance_time': distance_time,
+            'instance_time': instance_time,
+            'build_time': build_time,
+            'solve_time': solve_time,
+            'extract_time': extract_time,
+            'rows': gurobi_model.NumConstrs,
+            'columns': gurobi_model.NumVars,
+            'status': gurobi_model.status,
+            **model.objective_summary(),
+            'nodes': gurobi_model.NodeCount,
+            'vehicles': len(routes),
+            'feasible': None if verified is None else verified['feasible'],
+            'verified_distance': None if verified is None else verified['distance'],
+            'peak_rss_mb': peak_rss()}
+
+
+class Benchmark:
+    """
+    Solomon算例基准测试
+    逐个算例记录解析, 距离矩阵, 建模, 求解与提取解的时间, 以及目标值, MIP间隙, 节点数与峰值内存;
+    结果与最优已知解(best_known.csv)和之前保存的基线结果比较, 用于发现性能回退
+    best_known.csv只收录了C1/C2算例(车辆数优先的最优已知解与距离最优一致, 距离不取整),
+    因此默认只测试有参考值的C类算例; R1/R2/RC1/RC2算例需显式传入路径, 其结果中reference为'missing'
+    """
+    FIELDS = ['instance', 'customers', 'parse_time', 'distance_time', 'instance_time', 'build_time',
+              'solve_time', 'extract_time', 'rows', 'columns', 'status', 'objective', 'bound', 'gap',
+              'nodes', 'vehicles', 'feasible', 'verified_distance', 'peak_rss_mb', 'reference', 'best_known',
+              'gap_to_best',
+              'baseline_objective', 'baseline_solve_time', 'speedup', 'regression']
+
+    def __init__(self, data_path='data/solomon_100', time_limit=60, threads=None, model_class=Model,
+                 build_options=None, best_known_path=BEST_KNOWN_PATH, tolerance=0.1):
+        """
+        :param data_path: 算例目录
+        :param time_limit: 每个算例的求解时间限制, 单位为秒
+        :param threads: Gurobi线程数, 默认为None(由Gurobi决定)
+        :param model_class: 模型类, Model或TwoIndexModel
+        :param build_options: 传给build_model的参数, 如{'matrix': True}
+        :param best_known_path: 最优已知解文件, 列为instance, vehicles, distance
+        :param tolerance: 判定回退的相对容差, 求解时间超过基线的(1 + tolerance)倍或目标值变差时记为回退
+        """
+        self.data_path = data_path
+        self.time_limit = time_limit
+        self.threads = threads
+        self.model_class = model_class
+        self.build_options = build_options or {}
+        self.best_known = self.load_best_known(best_known_path)
+        self.tolerance = tolerance
+        self.results = []  # 结果表, 每个算例一行
+
+    @staticmethod
+    def load_best_known(path):
+        """
+        读取最优已知解
+        :return: {算例名: 距离}
+        """
+        if not os.path.isfile(path):
+            return {}
+        with open(path, newline='') as file:
+            return {row['instance']: float(row['distance']) for row in csv.DictReader(file)}
+
+    def run(self, instance_paths=None):
+        """
+        依次测试所有算例, 每个算例在新的进程中运行
+        :param instance_paths: 算例路径列表, 默认为目录下有最优已知解的算例(reference_paths)
+        :return: 按算例名排序的结果表
+        """
+        if instance_paths is None:
+            instance_paths = self.reference_paths()
+
+        tasks = [(path, self.model_class, self.time_limit, self.threads, self.build_options)
+                 for path in instance_paths]
+
+        self.results = []
+        # 单进程顺序运行保证计时不受其他算例干扰, maxtasksperchild=1使峰值内存按算例统计
+        with mp.Pool(processes=1, maxtasksperchild=1) as pool:
+            for result in pool.imap(benchmark_instance, tasks):
+                best = self.best_known.get(result['instance'])
+                result['best_known'] = best
+                result['reference'] = 'missing' if best is None else 'best_known'
+                result['gap_to_best'] = (None if best is None or result['objective'] is None
+                                         else (result['objective'] - best) / best)
+                if result['feasible'] is False:
+                    print(f"{result['instance']}: solution failed verification")
+                print(f"{result['instance']}: objective {result['objective']}, best known {best}, "
+                      f"build {result['build_time']:.2f}s, solve {result['solve_time']:.2f}s")
+                self.results.append(result)
+
+        self.results.sort(key=lambda r: r['instance'])
+        missing = self.missing_best_known()
+        if missing:
+            print(f"No best known reference for {len(missing)} instances, gap_to_best not computed: "
+                  f"{', '.join(missing)}")
+        return self.results
+
+    def reference_paths(self):
+        """
+        目录下有最优已知解的算例路径
+        """
+        return [path for path in Read(self.data_path).file_paths
+                if os.path.splitext(os.path.basename(path))[0] in self.best_known]
+
+    def missing_best_known(self):
+        """
+        结果表中没有最优已知解的算例
+        :return: 算例名列表
+        """
+        return [result['instance'] for result in self.results if result.get('best_known') is None]
+
+    def compare(self, baseline_path):
+        """
+        与之前保存的JSON结果比较, 在结果表中填入基线目标值, 基线求解时间, 加速比与是否回退
+        :param baseline_path: 基线结果文件
+        :return: 回退的算例名列表
+        """
+        with open(baseline_path) as file:
+            baseline = {row['instance']: row for row in json.load(file)}
+
+        regressions = []
+        for result in self.results:
+            base = baseline.get(result['instance'])
+            if base is None:
+                continue
+            result['baseline_objective'] = base['objective']
+            result['baseline_solve_time'] = base['solve_time']
+            result['speedup'] = base['solve_time'] / max(result['solve_time'], 1e-9)
+            slower = result['solve_time'] > base['solve_time'] * (1 + self.tolerance)
+            worse = (base['objective'] is not None
+                     and (result['objective'] is None or result['objective'] > base['objective'] + 1e-6))
+            result['regression'] = slower or worse
+            if result['regression']:
+                regressions.append(result['instance'])
+        return regressions
+
+    def save_csv(self, filename):
+        """
+        将结果表保存为CSV文件
+        """
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+            writer.writeheader()
+            for result in self.results:
+                writer.writerow({field: result.get(field) for field in self.FIELDS})
+
+    def save_json(self, filename):
+        """
+        将结果表保存为JSON文件, 可作为之后运行的基线
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.results, file, indent=2)
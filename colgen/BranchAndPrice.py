@@ -0,0 +1,243 @@
+import heapq
+import time
+
+from colgen.Labeling import Labeling
+from colgen.Master import Master
+from heuristic.Insertion import SolomonInsertion
+
+
+class BranchAndPrice:
+    """
+    分支定价求解器
+    主问题为路线上的集合覆盖问题(Master), 定价子问题为ng-route标号算法(Labeling),
+    先用限制标号数与扩展弧数的启发式定价, 找不到负检验数路线时再做精确定价;
+    在弧流量上分支, 按最优界优先搜索
+    """
+    def __init__(self, instance, time_limit=None, node_limit=10000, ng_size=8, max_columns=50,
+                 label_limit=8, arc_limit=10, verbose=True):
+        """
+        :param instance: 算例数据
+        :param time_limit: 时间限制, 单位为秒, 默认为None(不设置时间限制)
+        :param node_limit: 最多处理的分支节点数
+        :param ng_size: ng邻域大小
+        :param max_columns: 每次定价最多加入的列数
+        :param label_limit: 启发式定价中每个节点保留的标号数
+        :param arc_limit: 启发式定价中每个节点扩展的弧数
+        :param verbose: 是否输出求解过程
+        """
+        self.instance = instance  # 算例数据
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_columns = max_columns
+        self.label_limit = label_limit
+        self.arc_limit = arc_limit
+        self.verbose = verbose
+        self.num_vehicles = instance.num_vehicles  # 车辆数量
+
+        self.master = Master(instance, self.num_vehicles)
+        self.pricing = Labeling(instance, ng_size)
+
+        self.best_cost = float('inf')  # 当前最优整数解
+        self.best_routes = None
+        self.bound = -float('inf')  # 全局下界
+        self.nodes = 0  # 已处理的分支节点数
+        self.unresolved = []  # 未分支也未证明最优就关闭的节点的下界, 计入全局下界
+        self.started = None
+
+    def time_left(self):
+        if self.time_limit is None:
+            return True
+        return time.time() - self.started < self.time_limit
+
+    def ip_time_limit(self, limit=60):
+        """
+        整数主问题的时间限制: 不超过limit, 也不超过剩余的求解时间
+        """
+        if self.time_limit is None:
+            return limit
+        return max(0.0, min(limit, self.time_limit - (time.time() - self.started)))
+
+    def column_generation(self, forbidden):
+        """
+        在当前分支节点上做列生成, 直到没有负检验数路线
+        :param forbidden: 被禁止的弧集合
+        :return: (线性松弛目标值, 列取值, 是否收敛), 节点不可行时返回None
+        """
+        arc_mask = self.instance.arc_mask.copy()
+        for i, j in forbidden:
+            arc_mask[i, j] = False
+
+        while True:
+            result = self.master.solve_lp()
+            if result is None:
+                return None
+            objective, duals, values = result
+            if not self.time_left():
+                return objective, values, False
+
+            # 启发式定价
+            routes = self.pricing.solve(duals, arc_mask, self.max_columns, self.label_limit, self.arc_limit)
+            if not routes:
+                # 精确定价
+                routes = self.pricing.solve(duals, arc_mask, self.max_columns)
+            added = sum(self.master.add_route(route) for _, route in routes)
+            if added == 0:
+                if self.master.artificial_value() > 1e-6:
+                    return None
+                return objective, values, True
+
+    def arc_flows(self, values):
+        """
+        由列取值计算弧流量
+        """
+        flows = {}
+        for value, route in zip(values, self.master.routes):
+            if value > 1e-6:
+                for arc in zip(route[:-1], route[1:]):
+                    flows[arc] = flows.get(arc, 0.0) + value
+        return flows
+
+    def integer_routes(self, values):
+        """
+        列取值全为整数且路线不重复访问客户时, 返回对应的整数解路线
+        """
+        chosen = []
+        for value, route in zip(values, self.master.routes):
+            if value > 1e-6:
+                if abs(value - round(value)) > 1e-6:
+                    return None
+                chosen.extend([route] * int(round(value)))
+        return self.repair(chosen)
+
+    def repair(self, routes):
+        """
+        把集合覆盖解修复为每个客户只访问一次的路线: 删除重复访问
+        (距离满足三角不等式, 删除客户不会增加距离也不会破坏时间窗)
+        :return: 修复后的路线, 路线本身重复访问客户时返回None
+        """
+        seen = set()
+        repaired = []
+        for route in routes:
+            customers = route[1:-1]
+            if len(set(customers)) != len(customers):
+                return None
+            kept = [node for node in customers if node not in seen]
+            seen.update(kept)
+            if kept:
+                repaired.append([0] + kept + [0])
+        return repaired
+
+    def route_cost(self, routes):
+        dist = self.instance.distance
+        return sum(dist[i, j] for route in routes for i, j in zip(route[:-1], route[1:]))
+
+    def update_incumbent(self, routes):
+        if routes is None:
+            return
+        cost = self.route_cost(routes)
+        if cost < self.best_cost - 1e-9:
+            self.best_cost, self.best_routes = cost, routes
+            if self.verbose:
+                print(f"New incumbent: {cost:.4f}")
+
+    def solve(self):
+        """
+        求解
+        :return: {车辆编号: [(i, j), ...]}, 与Model.extract_solution格式一致, 无解时返回None
+        """
+        self.started = time.time()
+
+        # 初始列: 单客户路线与插入启发式路线
+        initial = SolomonInsertion(self.instance).solve()
+        for j in range(1, self.instance.n):
+            if self.instance.arc_mask[0, j]:
+                self.master.add_route([0, j, 0])
+        for route in initial:
+            self.master.add_route(route)
+        if len(initial) <= self.num_vehicles:
+            self.update_incumbent(initial)
+
+        # 最优界优先搜索, 节点为(下界, 序号, 被禁止的弧集合)
+        queue = [(-float('inf'), 0, frozenset())]
+        counter = 1
+        root = True
+        while queue and self.nodes < self.node_limit and self.time_left():
+            parent_bound, _, forbidden = heapq.heappop(queue)
+            if parent_bound >= self.best_cost - 1e-6:
+                continue
+            self.nodes += 1
+
+            self.master.forbid(forbidden)
+            result = self.column_generation(forbidden)
+            if result is None:
+                continue
+            objective, values, converged = result
+            if not converged:
+                # 时间用尽, 节点放回队列以计算全局下界
+                heapq.heappush(queue, (parent_bound, counter, forbidden))
+                break
+            node_bound = max(objective, parent_bound)
+
+            if root:
+                root = False
+                # 在根节点的列集合上求解整数主问题, 得到较好的上界
+                ip = self.master.solve_ip(time_limit=self.ip_time_limit())
+                if ip is not None:
+                    self.update_incumbent(self.repair(ip[1]))
+                if self.verbose:
+                    print(f"Root bound: {node_bound:.4f}, columns: {len(self.master.routes)}")
+
+            if node_bound >= self.best_cost - 1e-6:
+                continue
+
+            routes = self.integer_routes(values)
+            if routes is not None:
+                self.update_incumbent(routes)
+                continue
+
+            # 选择流量最接近0.5的弧进行分支
+            flows = self.arc_flows(values)
+            arc = min(flows, key=lambda a: abs(flows[a] - 0.5))
+            if abs(flows[arc] - round(flows[arc])) < 1e-6:
+                # 弧流量均为整数但列取值为分数, 弧分支无法继续, 用当前列求整数解;
+                # 整数解未达到节点下界时节点未被证明, 其下界保留在全局下界中
+                ip = self.master.solve_ip(time_limit=self.ip_time_limit())
+                if ip is not None:
+                    self.update_incumbent(self.repair(ip[1]))
+                if node_bound < self.best_cost - 1e-6:
+                    self.unresolved.append(node_bound)
+                continue
+
+            i, j = arc
+            # 分支1: 禁止弧(i, j)
+            heapq.heappush(queue, (node_bound, counter, forbidden | {arc}))
+            counter += 1
+            # 分支2: 强制使用弧(i, j), 禁止i的其他出弧与j的其他入弧
+            fixed = set()
+            n = self.instance.n
+            if i != 0:
+                fixed.update((i, k) for k in range(n) if k != j)
+            if j != 0:
+                fixed.update((k, j) for k in range(n) if k != i)
+            heapq.heappush(queue, (node_bound, counter, forbidden | fixed))
+            counter += 1
+
+            if self.verbose:
+                print(f"Node {self.nodes}: bound {node_bound:.4f}, incumbent {self.best_cost:.4f}, "
+                      f"open nodes {len(queue)}")
+
+        # 全局下界为剩余节点与未证明节点中的最小下界
+        open_bounds = [bound for bound, _, _ in queue] + self.unresolved
+        self.bound = min(open_bounds + [self.best_cost])
+        if self.best_routes is None:
+            return None
+        return self.to_solution(self.best_routes)
+
+    def to_solution(self, routes):
+        """
+        节点序列 -> {车辆编号: [(i, j), ...]}
+        """
+        solution = {k: [] for k in range(max(self.num_vehicles, len(routes)))}
+        for k, nodes in enumerate(routes):
+            solution[k] = list(zip(nodes[:-1], nodes[1:]))
+        return solution
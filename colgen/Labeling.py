@@ -0,0 +1,148 @@
+import heapq
+
+import numpy as np
+
+
+class Label:
+    """
+    标号: 从depot出发到达node的一条部分路径
+    """
+    __slots__ = ('node', 'cost', 'time', 'load', 'memory', 'parent', 'alive')
+
+    def __init__(self, node, cost, time, load, memory, parent):
+        self.node = node  # 当前节点
+        self.cost = cost  # 累计检验数
+        self.time = time  # 当前节点的开始服务时间
+        self.load = load  # 累计负载
+        self.memory = memory  # ng记忆集合(按位表示)
+        self.parent = parent  # 前一个标号
+        self.alive = True  # 是否未被支配
+
+    def dominates(self, other):
+        """
+        本标号支配other: 检验数, 时间, 负载都不大, 且ng记忆集合是other的子集
+        """
+        return (self.cost <= other.cost + 1e-9 and self.time <= other.time and self.load <= other.load
+                and self.memory & ~other.memory == 0)
+
+    def path(self):
+        nodes = []
+        label = self
+        while label is not None:
+            nodes.append(label.node)
+            label = label.parent
+        return nodes[::-1]
+
+
+class Labeling:
+    """
+    ng-route松弛的资源约束最短路(ESPPRC)标号算法
+    每个客户j有一个ng邻域N_j(距离最近的ng_size个客户), 路径只禁止重复访问仍在ng记忆集合中的客户;
+    ng_size不小于客户数时即为严格的初等最短路
+    """
+    def __init__(self, instance, ng_size=8):
+        """
+        :param instance: 算例数据
+        :param ng_size: ng邻域大小
+        """
+        self.instance = instance  # 算例数据
+        self.n = instance.n
+        self.ready = instance.ready_time.tolist()
+        self.due = instance.due_date.tolist()
+        self.service = instance.service_time.tolist()
+        self.demand = instance.demand.tolist()
+        self.travel_time = instance.travel_time.tolist()
+        self.capacity = instance.capacity
+
+        # ng邻域, 以位掩码表示, depot不进入记忆集合
+        self.ng = [0] * self.n
+        order = np.argsort(instance.distance, axis=1)
+        for j in range(1, self.n):
+            neighbours = [i for i in order[j].tolist() if i != 0][:ng_size]
+            mask = 1 << j
+            for i in neighbours:
+                mask |= 1 << i
+            self.ng[j] = mask
+
+    def solve(self, duals, arc_mask, max_routes=50, label_limit=None, arc_limit=None):
+        """
+        求解定价子问题
+        :param duals: 对偶值, duals[0]为车队约束对偶值, duals[i]为客户i覆盖约束对偶值
+        :param arc_mask: 允许使用的弧(n*n布尔矩阵), 已去掉分支中被禁止的弧
+        :param max_routes: 返回的最多路线数
+        :param label_limit: 每个节点保留的最多标号数, None表示不限制(精确定价)
+        :param arc_limit: 每个节点只沿检验数最小的arc_limit条弧扩展, None表示不限制(精确定价)
+        :return: 检验数为负的路线列表[(检验数, 节点序列), ...], 按检验数升序
+        """
+        n = self.n
+        pi = np.asarray(duals, dtype=np.float64)
+        # 弧(i, j)的检验数: c_ij - pi_i, 离开depot的弧减去车队约束对偶值
+        reduced = self.instance.distance - pi[:, None]
+        reduced_list = reduced.tolist()
+
+        successors = []
+        for i in range(n):
+            targets = np.flatnonzero(arc_mask[i])
+            if arc_limit is not None and len(targets) > arc_limit:
+                targets = targets[np.argsort(reduced[i, targets])[:arc_limit]]
+            successors.append(targets.tolist())
+
+        labels = [[] for _ in range(n)]  # 每个节点上未被支配的标号
+        root = Label(0, 0.0, self.ready[0], 0.0, 0, None)
+        queue = [(root.time, 0, root)]
+        counter = 1
+        complete = []
+
+        while queue:
+            _, _, label = heapq.heappop(queue)
+            if not label.alive:
+                continue
+            i = label.node
+            for j in successors[i]:
+                cost = label.cost + reduced_list[i][j]
+                if j == 0:
+                    # 返回depot, 得到完整路线
+                    if i != 0 and cost < -1e-6:
+                        complete.append((cost, label.path() + [0]))
+                    continue
+                if label.memory >> j & 1:
+                    continue
+                load = label.load + self.demand[j]
+                if load > self.capacity:
+                    continue
+                time = max(self.ready[j], label.time + self.service[i] + self.travel_time[i][j])
+                if time > self.due[j]:
+                    continue
+                new = Label(j, cost, time, load, (label.memory & self.ng[j]) | (1 << j), label)
+                if not self.insert(labels[j], new, label_limit):
+                    continue
+                heapq.heappush(queue, (time, counter, new))
+                counter += 1
+
+        complete.sort(key=lambda item: item[0])
+        return complete[:max_routes]
+
+    @staticmethod
+    def insert(bucket, new, label_limit):
+        """
+        支配检查并插入新标号
+        :return: 新标号是否被保留
+        """
+        for label in bucket:
+            if label.dominates(new):
+                return False
+        kept = []
+        for label in bucket:
+            if new.dominates(label):
+                label.alive = False
+            else:
+                kept.append(label)
+        kept.append(new)
+        if label_limit is not None and len(kept) > label_limit:
+            # 启发式定价: 只保留检验数最小的若干标号
+            kept.sort(key=lambda item: item.cost)
+            for label in kept[label_limit:]:
+                label.alive = False
+            kept = kept[:label_limit]
+        bucket[:] = kept
+        return new.alive
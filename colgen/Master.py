@@ -0,0 +1,109 @@
+import gurobipy as gp
+from gurobipy import GRB
+
+
+class Master:
+    """
+    集合覆盖主问题
+    min sum_r c_r * lambda_r
+    s.t. sum_r a_ir * lambda_r >= 1    对每个客户i
+         sum_r lambda_r <= K
+    其中a_ir为路线r访问客户i的次数, 每个覆盖约束带有高费用的人工变量以保证受限主问题始终可行
+    """
+    def __init__(self, instance, num_vehicles, penalty=1e5):
+        """
+        :param instance: 算例数据
+        :param num_vehicles: 车辆数量上限
+        :param penalty: 人工变量费用
+        """
+        self.instance = instance  # 算例数据
+        self.num_vehicles = num_vehicles  # 车辆数量
+        self.model = gp.Model("master")
+        self.model.setParam('OutputFlag', 0)
+
+        # 人工变量与覆盖约束
+        self.artificial = self.model.addVars(range(1, instance.n), obj=penalty, name="artificial")
+        self.cover = {i: self.model.addConstr(self.artificial[i] >= 1, f"cover_{i}")
+                      for i in range(1, instance.n)}
+        self.fleet = self.model.addConstr(gp.LinExpr() <= num_vehicles, "fleet")
+
+        self.routes = []  # 列对应的路线(节点序列)
+        self.arcs = []  # 每列使用的弧集合
+        self.costs = []  # 每列的距离
+        self.vars = []  # 列变量
+        self.known = set()  # 已加入的路线, 避免重复列
+
+    def add_route(self, route):
+        """
+        添加一条路线作为新列
+        :param route: 以depot开始和结束的节点序列
+        :return: 是否添加(重复路线不添加)
+        """
+        key = tuple(route)
+        if key in self.known:
+            return False
+        self.known.add(key)
+
+        dist = self.instance.distance
+        arcs = list(zip(route[:-1], route[1:]))
+        cost = sum(dist[i, j] for i, j in arcs)
+
+        counts = {}
+        for node in route[1:-1]:
+            counts[node] = counts.get(node, 0) + 1
+        column = gp.Column([float(c) for c in counts.values()] + [1.0],
+                           [self.cover[node] for node in counts] + [self.fleet])
+        var = self.model.addVar(obj=cost, column=column, name=f"route_{len(self.routes)}")
+
+        self.routes.append(list(route))
+        self.arcs.append(set(arcs))
+        self.costs.append(cost)
+        self.vars.append(var)
+        return True
+
+    def forbid(self, forbidden):
+        """
+        将包含被禁止弧的列上界设为0
+        :param forbidden: 被禁止的弧集合
+        """
+        for var, arcs in zip(self.vars, self.arcs):
+            var.UB = 0.0 if arcs & forbidden else GRB.INFINITY
+
+    def solve_lp(self):
+        """
+        求解线性松弛
+        :return: (目标值, 客户对偶值数组(下标0为车队约束对偶值), 列取值列表), 不可行时返回None
+        """
+        self.model.optimize()
+        if self.model.status != GRB.OPTIMAL:
+            return None
+        duals = [self.fleet.Pi] + [self.cover[i].Pi for i in range(1, self.instance.n)]
+        values = self.model.getAttr('X', self.vars) if self.vars else []
+        return self.model.ObjVal, duals, values
+
+    def artificial_value(self):
+        """
+        人工变量取值之和, 大于0说明当前列无法覆盖所有客户
+        """
+        return sum(self.model.getAttr('X', self.artificial).values())
+
+    def solve_ip(self, time_limit=None):
+        """
+        在当前列集合上求解整数集合覆盖问题(price-and-branch)
+        :param time_limit: 时间限制, 单位为秒
+        :return: (目标值, 被选中的路线列表), 无整数解时返回None
+        """
+        self.model.setAttr('VType', self.vars, [GRB.BINARY] * len(self.vars))
+        if time_limit is not None:
+            self.model.setParam('TimeLimit', time_limit)
+        self.model.optimize()
+        result = None
+        if self.model.SolCount > 0 and self.artificial_value() < 0.5:
+            values = self.model.getAttr('X', self.vars)
+            chosen = [route for route, value in zip(self.routes, values) if value > 0.5]
+            result = self.model.ObjVal, chosen
+
+        # 恢复为线性松弛
+        self.model.setAttr('VType', self.vars, [GRB.CONTINUOUS] * len(self.vars))
+        self.model.setParam('TimeLimit', GRB.INFINITY)
+        return result
@@ -1,10 +1,14 @@
+import os
+
 import numpy as np
 from gurobipy import *
 import matplotlib.pyplot as plt
+from read.InstanceRegistry import InstanceRegistry
 
 
 class VRPTWSolver:
-    def __init__(self, coordinates, demands, time_windows, service_times, capacity, num_vehicles, depot=0):
+    def __init__(self, coordinates, demands, time_windows, service_times, capacity, num_vehicles, depot=0,
+                 instance=None):
         """
         初始化VRPTW求解器
 
@@ -16,6 +20,7 @@ class VRPTWSolver:
             capacity: float, 车辆容量
             num_vehicles: int, 车辆数量
             depot: int, 仓库节点索引(默认为0)
+            instance: Instance, 共享的算例, 给定时直接使用其距离矩阵
         """
         self.coordinates = coordinates
         self.demands = demands
@@ -26,7 +31,8 @@ class VRPTWSolver:
         self.depot = depot
 
         self.n = len(coordinates)  # 节点数量
-        self.distances = self._calculate_distances()
+        self.instance = instance  # 共享的算例
+        self.distances = instance.distance if instance is not None else self._calculate_distances()
         self.times = self.distances  # 假设行驶时间等于距离
 
         self.model = None
@@ -34,6 +40,14 @@ class VRPTWSolver:
         self.t_vars = None  # 到达时间变量
         self.solution = None
 
+    @classmethod
+    def from_instance(cls, instance):
+        """
+        由Instance(如InstanceRegistry中的共享算例)创建求解器, 直接使用Instance的距离矩阵
+        """
+        coordinates, demands, time_windows, service_times, capacity, num_vehicles = instance_arguments(instance)
+        return cls(coordinates, demands, time_windows, service_times, capacity, num_vehicles, instance=instance)
+
     def _calculate_distances(self):
         """计算节点间距离矩阵"""
         distances = np.zeros((self.n, self.n))
@@ -214,40 +228,30 @@ class VRPTWSolver:
 
 def read_solomon_instance(filename):
     """
-    读取Solomon算例文件
+    读取Solomon算例文件, 通过共享的InstanceRegistry解析, 与Read/Model使用同一份算例数据
 
     Parameters:
         filename: str, Solomon算例文件路径
     Returns:
         tuple: (coordinates, demands, time_windows, service_times, capacity, vehicle_num)
     """
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-
-    # 读取车辆数量和容量
-    vehicle_info = lines[4].strip().split()
-    num_vehicles = int(vehicle_info[0])
-    capacity = int(vehicle_info[1])
-
-    # 跳过头部信息
-    data_start = 9
-
-    coordinates = []
-    demands = []
-    time_windows = []
-    service_times = []
-
-    # 读取节点信息
-    for line in lines[data_start:]:
-        if line.strip():
-            data = list(map(float, line.strip().split()))
-            # Solomon格式：CUST NO.  XCOORD.   YCOORD.    DEMAND   READY TIME   DUE DATE   SERVICE TIME
-            coordinates.append((data[1], data[2]))
-            demands.append(data[3])
-            time_windows.append((data[4], data[5]))
-            service_times.append(data[6])
-
-    return coordinates, demands, time_windows, service_times, capacity, num_vehicles
+    instance = InstanceRegistry.shared(os.path.dirname(filename) or '.').get(filename)
+    return instance_arguments(instance)
+
+
+def instance_arguments(instance):
+    """
+    Instance -> VRPTWSolver的构造参数
+    Instance中的due_date为截止时间加服务时间, 这里还原为算例文件中的截止时间
+
+    Returns:
+        tuple: (coordinates, demands, time_windows, service_times, capacity, vehicle_num)
+    """
+    coordinates = list(zip(instance.x.tolist(), instance.y.tolist()))
+    demands = instance.demand.tolist()
+    time_windows = list(zip(instance.ready_time.tolist(), (instance.due_date - instance.service_time).tolist()))
+    service_times = instance.service_time.tolist()
+    return coordinates, demands, time_windows, service_times, instance.capacity, instance.num_vehicles
 
 
 if __name__ == "__main__":
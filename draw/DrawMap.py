@@ -1,8 +1,12 @@
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.figure import Figure
 from matplotlib.patches import Circle, Rectangle
 import random
 import colorsys
+from read.Instance import Instance
 
 
 class DrawMap:
@@ -10,12 +14,29 @@ class DrawMap:
     绘制VRP问题的路线图
     """
 
-    def __init__(self, customer_data, vehicle_data):
-        self.customer_data = customer_data
+    def __init__(self, customer_data, vehicle_data, instance=None):
+        self._customer_data = customer_data
         self.vehicle_data = vehicle_data
+        self.instance = instance or Instance(vehicle_data, customer_data)
         self.num_vehicles = vehicle_data['number']
         self.colors = self.generate_colors(self.num_vehicles)
 
+    @classmethod
+    def from_instance(cls, instance):
+        """
+        由已构建的算例创建绘图对象, 与模型共享同一Instance
+        """
+        return cls(None, instance.vehicle_data, instance)
+
+    @property
+    def customer_data(self):
+        """
+        客户数据列表, 由算例创建时在访问时才从算例生成
+        """
+        if self._customer_data is None:
+            return self.instance.customer_data
+        return self._customer_data
+
     @staticmethod
     def generate_colors(n):
         """
@@ -31,22 +52,24 @@ class DrawMap:
             colors.append(rgb)
         return colors
 
-    def draw_customers(self, ax):
+    def draw_customers(self, ax, labels=True):
         """
-        绘制客户点
+        绘制客户点, 所有客户在一次scatter中绘制
+        :param labels: 是否添加客户编号标签, 客户很多或批量导出时可以关闭
         """
+        instance = self.instance
+
         # 绘制配送中心（depot）
-        depot = self.customer_data[0]
-        ax.scatter(depot['x'], depot['y'], c='red', s=200, marker='*', label='Depot')
+        ax.scatter(instance.x[0], instance.y[0], c='red', s=200, marker='*', label='Depot')
 
         # 绘制客户点
-        for customer in self.customer_data[1:]:  # 跳过depot
-            x, y = customer['x'], customer['y']
-            # 绘制客户点
-            ax.scatter(x, y, c='blue', s=100)
-            # 添加客户编号标签
-            ax.annotate(f"C{customer['id']}", (x, y), xytext=(5, 5),
-                        textcoords='offset points')
+        ax.scatter(instance.x[1:], instance.y[1:], c='blue', s=100)
+
+        # 添加客户编号标签
+        if labels:
+            for i in range(1, instance.n):  # 跳过depot
+                ax.annotate(f"C{instance.ids[i]}", (instance.x[i], instance.y[i]), xytext=(5, 5),
+                            textcoords='offset points')
 
             # # 添加需求量标签
             # ax.annotate(f"D:{customer['demand']}", (x, y), xytext=(5, -10),
@@ -89,36 +112,33 @@ class DrawMap:
 
     def draw_routes(self, solution, ax):
         """
-        绘制路线
+        绘制路线, 所有弧在一次quiver中绘制, 颜色按车辆区分
         """
-        for k, route in solution.items():
-            color = self.colors[k]
-
-            # 绘制路线
-            for i, j in route:
-                # 起点坐标
-                start_x = self.customer_data[i]['x']
-                start_y = self.customer_data[i]['y']
-                # 终点坐标
-                end_x = self.customer_data[j]['x']
-                end_y = self.customer_data[j]['y']
-
-                # 画箭头
-                ax.arrow(start_x, start_y, end_x - start_x, end_y - start_y,
-                         head_width=2, head_length=3, fc=color, ec=color,
-                         length_includes_head=True, alpha=0.6)
-
-            # 添加路线标签 - 可以保留，但要确保label已定义
-            label = f'Vehicle {k + 1}'
-
-    def draw_solution(self, solution, title="VRP Solution"):
+        arcs = [(i, j, k) for k, route in solution.items() for i, j in route]
+        if not arcs:
+            return
+        i, j, k = np.array(arcs, dtype=np.int64).T
+        xs, ys = self.instance.x, self.instance.y
+        colors = np.array(self.colors)[k % len(self.colors)]
+
+        # 画箭头: 从节点i指向节点j, 按数据坐标缩放
+        ax.quiver(xs[i], ys[i], xs[j] - xs[i], ys[j] - ys[i], color=colors, alpha=0.6,
+                  angles='xy', scale_units='xy', scale=1, width=0.002, headwidth=6, headlength=8)
+
+    def draw_solution(self, solution, title="VRP Solution", headless=False, labels=True):
         """
         绘制完整的解决方案
+        :param headless: 是否不经过pyplot直接创建Figure, 用于批量导出, 不需要图形界面
+        :param labels: 是否添加客户编号标签
         """
-        fig, ax = plt.subplots(figsize=(12, 8))
+        if headless:
+            fig = Figure(figsize=(12, 8))
+            ax = fig.subplots()
+        else:
+            fig, ax = plt.subplots(figsize=(12, 8))
 
         # 绘制客户点
-        self.draw_customers(ax)
+        self.draw_customers(ax, labels)
 
         # 绘制路线
         self.draw_routes(solution, ax)
@@ -133,24 +153,46 @@ class DrawMap:
         # 添加文本框显示车辆信息
         info_text = f"Number of Vehicles: {self.num_vehicles}\n"
         info_text += f"Vehicle Capacity: {self.vehicle_data['capacity']}"
-        plt.text(0.02, 0.98, info_text, transform=ax.transAxes,
-                 bbox=dict(facecolor='white', alpha=0.8),
-                 verticalalignment='top')
+        ax.text(0.02, 0.98, info_text, transform=ax.transAxes,
+                bbox=dict(facecolor='white', alpha=0.8),
+                verticalalignment='top')
 
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
 
-    def save_figure(self, solution, filename, title="VRP Solution"):
+    def save_figure(self, solution, filename, title="VRP Solution", dpi=300):
         """
-        保存绘图结果
+        保存绘图结果, 不经过pyplot
         """
-        fig = self.draw_solution(solution, title)
-        fig.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close(fig)
+        fig = self.draw_solution(solution, title, headless=True)
+        fig.savefig(filename, dpi=dpi, bbox_inches='tight')
 
-    def show_figure(self, solution, title="VRP Solution"):
+    def show_figure(self, solution, title="VRP Solution", filename=None, dpi=300):
         """
         显示绘图结果
+        :param filename: 给定时先保存同一张图再显示, 不必重复绘制
+        """
+        fig = self.draw_solution(solution, title)
+        if filename is not None:
+            fig.savefig(filename, dpi=dpi, bbox_inches='tight')
+        plt.show()
+
+    @staticmethod
+    def export_all(items, directory, dpi=300, labels=True):
+        """
+        无界面批量导出
+        :param items: 可迭代的(算例, 解, 名称), 解的格式与Model.extract_solution一致
+        :param directory: 输出目录, 每个解保存为<名称>.png
+        :param dpi: 分辨率
+        :param labels: 是否添加客户编号标签
+        :return: 导出的文件路径列表
         """
-        self.draw_solution(solution, title)
-        plt.show()
\ No newline at end of file
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for instance, solution, name in items:
+            draw_map = DrawMap.from_instance(instance)
+            fig = draw_map.draw_solution(solution, f"{name} VRPTW Solution", headless=True, labels=labels)
+            path = os.path.join(directory, f"{name}.png")
+            fig.savefig(path, dpi=dpi, bbox_inches='tight')
+            paths.append(path)
+        return paths
@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class Evaluator:
+    """
+    路线评估与解的校验
+    所有路线补齐为 路线数*最大长度 的矩阵, 距离, 负载与违反量对所有路线一次性向量化计算;
+    开始服务时间的递推 start_j = max(ready_j, start_i + s_i + t_ij) 只按位置循环(路线长度次), 每步同时处理所有路线
+    约定与模型一致: due_date为算例中的due_date(含服务时间), 返回depot的时间不受约束
+    """
+    def __init__(self, instance, tolerance=1e-6):
+        """
+        :param instance: 算例数据
+        :param tolerance: 判定违反的容差
+        """
+        self.instance = instance  # 算例数据
+        self.tolerance = tolerance
+
+    @staticmethod
+    def node_routes(solution):
+        """
+        统一路线格式
+        :param solution: 路线列表[[0, ..., 0], ...], 或{车辆编号: [(i, j), ...]}(Model.extract_solution格式)
+        :return: 非空路线的节点序列列表
+        """
+        if isinstance(solution, dict):
+            routes = []
+            for arcs in solution.values():
+                if arcs:
+                    routes.append([arcs[0][0]] + [j for i, j in arcs])
+            return routes
+        return [list(route) for route in solution if len(route) > 2]
+
+    @staticmethod
+    def matrix(routes):
+        """
+        路线列表 -> (节点矩阵, 有效位置掩码), 不足最大长度的位置以depot补齐
+        """
+        length = max(len(route) for route in routes)
+        nodes = np.zeros((len(routes), length), dtype=np.int64)
+        mask = np.zeros((len(routes), length), dtype=bool)
+        for r, route in enumerate(routes):
+            nodes[r, :len(route)] = route
+            mask[r, :len(route)] = True
+        return nodes, mask
+
+    def total_distance(self, solution):
+        """
+        只计算总距离, 用于大量候选解的快速打分
+        """
+        routes = self.node_routes(solution)
+        if not routes:
+            return 0.0
+        flat = np.concatenate([np.asarray(route, dtype=np.int64) for route in routes])
+        legs = self.instance.distance[flat[:-1], flat[1:]]
+        # 去掉相邻两条路线之间的连接
+        ends = np.cumsum([len(route) for route in routes])[:-1] - 1
+        return float(legs.sum() - legs[ends].sum())
+
+    def evaluate(self, solution):
+        """
+        评估解
+        :param solution: 路线列表或Model.extract_solution格式的解
+        :return: 结果字典:
+            routes: 节点序列列表
+            distance: 总距离; route_distance: 每条路线的距离
+            load: 每条路线的总负载; capacity_excess: 每条路线超出容量的量
+            start: 每个位置的开始服务时间(路线数*最大长度, 无效位置为nan); waiting: 每个位置的等待时间
+            lateness: 每个位置超过时间窗的量
+            missing: 未被访问的客户; duplicated: 被访问多次的客户; bad_ends: 不以depot开始和结束的路线
+            feasible: 是否可行
+        """
+        instance = self.instance
+        routes = self.node_routes(solution)
+        if not routes:
+            missing = list(range(1, instance.n))
+            return {'routes': [], 'distance': 0.0, 'route_distance': np.zeros(0), 'load': np.zeros(0),
+                    'capacity_excess': np.zeros(0), 'start': np.zeros((0, 0)), 'waiting': np.zeros((0, 0)),
+                    'lateness': np.zeros((0, 0)), 'missing': missing, 'duplicated': [], 'bad_ends': [],
+                    'feasible': not missing}
+
+        nodes, mask = self.matrix(routes)
+        legs = mask[:, 1:]  # 有效的弧
+        prev, succ = nodes[:, :-1], nodes[:, 1:]
+
+        # 距离与负载
+        leg_distance = np.where(legs, instance.distance[prev, succ], 0.0)
+        route_distance = leg_distance.sum(axis=1)
+        load = np.where(mask, instance.demand[nodes], 0.0).sum(axis=1)
+        capacity_excess = np.maximum(0.0, load - instance.capacity)
+
+        # 开始服务时间, 按位置递推
+        ready, due, service = instance.ready_time[nodes], instance.due_date[nodes], instance.service_time[nodes]
+        travel = instance.travel_time[prev, succ]
+        start = np.full(nodes.shape, np.nan)
+        arrival = np.full(nodes.shape, np.nan)
+        start[:, 0] = arrival[:, 0] = ready[:, 0]
+        for p in range(1, nodes.shape[1]):
+            arrival[:, p] = start[:, p - 1] + service[:, p - 1] + travel[:, p - 1]
+            start[:, p] = np.maximum(ready[:, p], arrival[:, p])
+        start[~mask] = np.nan
+        waiting = np.where(mask, start - np.where(mask, arrival, 0.0), np.nan)
+
+        # 时间窗违反: 只检查客户, 返回depot不受约束
+        customer = mask & (nodes != 0)
+        lateness = np.where(customer, np.maximum(0.0, start - due), 0.0)
+
+        # 覆盖: 每个客户恰好访问一次
+        visits = np.bincount(nodes[customer], minlength=instance.n)
+        missing = (np.flatnonzero(visits[1:] == 0) + 1).tolist()
+        duplicated = (np.flatnonzero(visits[1:] > 1) + 1).tolist()
+        lengths = mask.sum(axis=1)
+        bad_ends = np.flatnonzero((nodes[:, 0] != 0) | (nodes[np.arange(len(routes)), lengths - 1] != 0)).tolist()
+
+        tol = self.tolerance
+        feasible = (not missing and not duplicated and not bad_ends
+                    and bool((capacity_excess <= tol).all()) and bool((lateness <= tol).all()))
+        return {'routes': routes,
+                'distance': float(route_distance.sum()),
+                'route_distance': route_distance,
+                'load': load,
+                'capacity_excess': capacity_excess,
+                'start': start,
+                'waiting': waiting,
+                'lateness': lateness,
+                'missing': missing,
+                'duplicated': duplicated,
+                'bad_ends': bad_ends,
+                'feasible': feasible}
+
+    def verify(self, solution):
+        """
+        校验解, 不可行时返回违反的描述
+        :return: 违反描述列表, 可行时为空
+        """
+        result = self.evaluate(solution)
+        problems = []
+        if result['missing']:
+            problems.append(f"customers not visited: {result['missing']}")
+        if result['duplicated']:
+            problems.append(f"customers visited more than once: {result['duplicated']}")
+        for r in result['bad_ends']:
+            problems.append(f"route {result['routes'][r]} does not start and end at the depot")
+        for r in np.flatnonzero(result['capacity_excess'] > self.tolerance).tolist():
+            problems.append(f"route {r} exceeds capacity by {result['capacity_excess'][r]:.2f}")
+        for r, p in zip(*np.nonzero(result['lateness'] > self.tolerance)):
+            problems.append(f"route {r} reaches node {result['routes'][r][p]} "
+                            f"{result['lateness'][r, p]:.2f} after its due date")
+        return problems
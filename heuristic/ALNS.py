@@ -0,0 +1,537 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from heuristic.Insertion import SolomonInsertion
+
+
+class Route:
+    """
+    ALNS中的一条路线及其缓存
+    start[p]为第p个节点的开始服务时间(前向递推), latest[p]为不破坏后续时间窗的最晚开始服务时间(后向递推),
+    两者之差即该位置的前向时间松弛量, 用于O(1)判断插入/交换/2-opt*的可行性
+    """
+    __slots__ = ('nodes', 'start', 'latest', 'prefix_load', 'load', 'cost')
+
+    def __init__(self, nodes):
+        self.nodes = nodes  # 节点序列, 以depot开始和结束
+        self.start = None  # 开始服务时间
+        self.latest = None  # 最晚开始服务时间
+        self.prefix_load = None  # 前缀负载
+        self.load = 0.0  # 总负载
+        self.cost = 0.0  # 路线距离
+
+
+class ALNS:
+    """
+    自适应大邻域搜索(ALNS)求解器
+    破坏算子: 随机移除, 最差移除, 相关性(Shaw)移除
+    修复算子: 贪婪插入, regret-2插入
+    局部搜索: 基于近邻候选表的relocate, exchange与2-opt*
+    接受准则为模拟退火, 算子权重按得分自适应调整
+    """
+    def __init__(self, instance, iterations=5000, time_limit=None, seed=None, neighbours=20):
+        """
+        :param instance: 算例数据
+        :param iterations: 最大迭代次数
+        :param time_limit: 时间限制, 单位为秒, 默认为None(不设置时间限制)
+        :param seed: 随机数种子
+        :param neighbours: 局部搜索中每个客户考虑的近邻个数
+        """
+        self.instance = instance  # 算例数据
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.random = random.Random(seed)
+        self.num_vehicles = instance.num_vehicles  # 车辆数量上限
+        self.customers = list(range(1, instance.n))
+
+        # 标量访问使用Python列表, 比逐元素索引NumPy数组快
+        self.dist = instance.distance.tolist()
+        self.ready = instance.ready_time.tolist()
+        self.due = instance.due_date.tolist()
+        self.service = instance.service_time.tolist()
+        self.demand = instance.demand.tolist()
+        self.capacity = instance.capacity
+
+        # 近邻候选表
+        k = min(neighbours, instance.n - 2)
+        order = np.argsort(instance.distance[1:, 1:], axis=1)[:, 1:k + 1] + 1
+        self.neighbours = [None] + order.tolist()
+
+        # 算子与自适应权重
+        self.destroy_operators = [self.random_removal, self.worst_removal, self.shaw_removal]
+        self.repair_operators = [self.greedy_insertion, self.regret_insertion]
+        self.scores = (33.0, 9.0, 13.0)  # 新的最优解, 优于当前解, 被接受
+        self.reaction = 0.1  # 权重更新系数
+        self.segment = 100  # 权重更新周期
+
+        self.best_routes = None  # 最优路线
+        self.best_cost = None  # 最优距离
+
+    # ------------------------------------------------------------------
+    # 路线缓存
+    # ------------------------------------------------------------------
+    def update(self, route):
+        """
+        重新计算路线的开始服务时间, 最晚开始服务时间, 前缀负载与距离
+        """
+        nodes, dist, service = route.nodes, self.dist, self.service
+        m = len(nodes)
+        start = [0.0] * m
+        prefix_load = [0.0] * m
+        start[0] = self.ready[nodes[0]]
+        cost = 0.0
+        for p in range(1, m):
+            i, j = nodes[p - 1], nodes[p]
+            start[p] = max(self.ready[j], start[p - 1] + service[i] + dist[i][j])
+            prefix_load[p] = prefix_load[p - 1] + self.demand[j]
+            cost += dist[i][j]
+        latest = [0.0] * m
+        latest[-1] = self.due[nodes[-1]]
+        for p in range(m - 2, -1, -1):
+            i, j = nodes[p], nodes[p + 1]
+            latest[p] = min(self.due[i], latest[p + 1] - service[i] - dist[i][j])
+        route.start, route.latest, route.prefix_load = start, latest, prefix_load
+        route.load, route.cost = prefix_load[-1], cost
+        return route
+
+    def make_route(self, nodes):
+        return self.update(Route(nodes))
+
+    def copy(self, routes):
+        """
+        复制解, 缓存为只读列表, 可以共享
+        """
+        copies = []
+        for route in routes:
+            new = Route(list(route.nodes))
+            new.start, new.latest, new.prefix_load = route.start, route.latest, route.prefix_load
+            new.load, new.cost = route.load, route.cost
+            copies.append(new)
+        return copies
+
+    @staticmethod
+    def total_cost(routes):
+        return sum(route.cost for route in routes)
+
+    # ------------------------------------------------------------------
+    # O(1)可行性判断
+    # ------------------------------------------------------------------
+    def can_insert(self, route, p, u):
+        """
+        判断客户u插入到路线第p-1与第p个节点之间是否满足时间窗
+        :return: 可行时返回距离增量, 否则返回None
+        """
+        nodes, dist = route.nodes, self.dist
+        i, j = nodes[p - 1], nodes[p]
+        start_u = max(self.ready[u], route.start[p - 1] + self.service[i] + dist[i][u])
+        if start_u > self.due[u]:
+            return None
+        start_j = max(self.ready[j], start_u + self.service[u] + dist[u][j])
+        if start_j > route.latest[p]:
+            return None
+        return dist[i][u] + dist[u][j] - dist[i][j]
+
+    def best_insertion(self, route, u):
+        """
+        客户u在路线中的最优插入位置
+        :return: (距离增量, 插入位置), 不可插入时为(None, None)
+        """
+        if route.load + self.demand[u] > self.capacity:
+            return None, None
+        best_delta, best_p = None, None
+        for p in range(1, len(route.nodes)):
+            delta = self.can_insert(route, p, u)
+            if delta is not None and (best_delta is None or delta < best_delta):
+                best_delta, best_p = delta, p
+        return best_delta, best_p
+
+    def can_remove(self, route, p):
+        """
+        判断移除路线第p个节点后是否满足时间窗
+        """
+        nodes = route.nodes
+        i, j = nodes[p - 1], nodes[p + 1]
+        start_j = max(self.ready[j], route.start[p - 1] + self.service[i] + self.dist[i][j])
+        return start_j <= route.latest[p + 1]
+
+    def can_replace(self, route, p, v):
+        """
+        判断把路线第p个节点替换为客户v后是否满足时间窗
+        """
+        nodes, dist = route.nodes, self.dist
+        i, j = nodes[p - 1], nodes[p + 1]
+        start_v = max(self.ready[v], route.start[p - 1] + self.service[i] + dist[i][v])
+        if start_v > self.due[v]:
+            return False
+        start_j = max(self.ready[j], start_v + self.service[v] + dist[v][j])
+        return start_j <= route.latest[p + 1]
+
+    # ------------------------------------------------------------------
+    # 破坏算子
+    # ------------------------------------------------------------------
+    def remove(self, routes, removed):
+        """
+        从解中移除客户并删除空路线
+        """
+        removed_set = set(removed)
+        kept = []
+        for route in routes:
+            nodes = [node for node in route.nodes if node not in removed_set]
+            if len(nodes) == len(route.nodes):
+                kept.append(route)
+            elif len(nodes) > 2:
+                route.nodes = nodes
+                kept.append(self.update(route))
+        routes[:] = kept
+
+    def random_removal(self, routes, q):
+        removed = self.random.sample(self.customers, q)
+        self.remove(routes, removed)
+        return removed
+
+    def worst_removal(self, routes, q, p=3):
+        """
+        按移除后节省的距离排序, 带随机扰动地移除节省最多的客户
+        """
+        dist = self.dist
+        savings = []
+        for route in routes:
+            nodes = route.nodes
+            for pos in range(1, len(nodes) - 1):
+                i, u, j = nodes[pos - 1], nodes[pos], nodes[pos + 1]
+                savings.append((dist[i][u] + dist[u][j] - dist[i][j], u))
+        savings.sort(reverse=True)
+        removed = []
+        while len(removed) < q and savings:
+            index = int(len(savings) * self.random.random() ** p)
+            removed.append(savings.pop(index)[1])
+        self.remove(routes, removed)
+        return removed
+
+    def shaw_removal(self, routes, q, p=6):
+        """
+        相关性移除: 按距离与开始服务时间的相似度移除相关客户
+        """
+        start = np.zeros(self.instance.n)
+        for route in routes:
+            start[route.nodes] = route.start
+        distance = self.instance.distance
+        scale_d = distance.max() or 1.0
+        scale_t = start.max() or 1.0
+
+        removed = [self.random.choice(self.customers)]
+        candidates = np.array([u for u in self.customers if u != removed[0]])
+        while len(removed) < q and len(candidates):
+            seed = self.random.choice(removed)
+            relatedness = distance[seed, candidates] / scale_d + np.abs(start[candidates] - start[seed]) / scale_t
+            order = np.argsort(relatedness)
+            index = order[int(len(order) * self.random.random() ** p)]
+            removed.append(int(candidates[index]))
+            candidates = np.delete(candidates, index)
+        self.remove(routes, removed)
+        return removed
+
+    # ------------------------------------------------------------------
+    # 修复算子
+    # ------------------------------------------------------------------
+    def greedy_insertion(self, routes, removed):
+        return self.insert(routes, removed, regret=False)
+
+    def regret_insertion(self, routes, removed):
+        return self.insert(routes, removed, regret=True)
+
+    def insert(self, routes, removed, regret):
+        """
+        逐个插入被移除的客户, 每次插入后只重新计算被修改路线上的插入代价
+        插入代价只在包含近邻客户的路线上计算, 没有可行候选时才扫描全部路线
+        :param regret: True时按regret-2准则选择客户, 否则选择插入代价最小的客户
+        :return: 是否全部插入成功
+        """
+        pending = list(removed)
+        self.random.shuffle(pending)
+        where = {node: route for route in routes for node in route.nodes[1:-1]}
+        # cache[u][route_id] = (距离增量, 插入位置)
+        cache = {}
+        for u in pending:
+            candidates = {id(where[v]): where[v] for v in self.neighbours[u] if v in where}
+            cache[u] = {rid: self.best_insertion(route, u) for rid, route in candidates.items()}
+        by_id = {id(route): route for route in routes}
+
+        while pending:
+            chosen, chosen_route, chosen_p, chosen_key = None, None, None, None
+            for u in pending:
+                options = sorted((delta, rid, p) for rid, (delta, p) in cache[u].items() if delta is not None)
+                if not options and len(cache[u]) < len(by_id):
+                    # 近邻路线均不可插入, 扫描全部路线
+                    cache[u] = {rid: self.best_insertion(route, u) for rid, route in by_id.items()}
+                    options = sorted((delta, rid, p) for rid, (delta, p) in cache[u].items() if delta is not None)
+                if not options:
+                    key = math.inf  # 无法插入的客户优先处理
+                    option = None
+                elif regret:
+                    second = options[1][0] if len(options) > 1 else math.inf
+                    key = second - options[0][0]
+                    option = options[0]
+                else:
+                    key = -options[0][0]
+                    option = options[0]
+                if chosen_key is None or key > chosen_key:
+                    chosen, chosen_key = u, key
+                    chosen_route, chosen_p = (None, None) if option is None else (by_id[option[1]], option[2])
+
+            pending.remove(chosen)
+            if chosen_route is None:
+                # 开启新路线
+                if len(routes) >= self.num_vehicles:
+                    return False
+                route = self.make_route([0, chosen, 0])
+                if route.start[1] > self.due[chosen] or route.load > self.capacity:
+                    return False
+                routes.append(route)
+                by_id[id(route)] = route
+            else:
+                route = chosen_route
+                route.nodes.insert(chosen_p, chosen)
+                self.update(route)
+            where[chosen] = route
+            rid = id(route)
+            for u in pending:
+                if rid in cache[u] or chosen in self.neighbours[u]:
+                    cache[u][rid] = self.best_insertion(route, u)
+        return True
+
+    # ------------------------------------------------------------------
+    # 局部搜索
+    # ------------------------------------------------------------------
+    def local_search(self, routes, customers=None):
+        """
+        基于近邻候选表的首次改进局部搜索, 直到没有改进为止
+        :param customers: 作为移动起点的客户, 默认为全部客户
+        """
+        improved = True
+        while improved:
+            improved = False
+            where = self.positions(routes)
+            order = list(self.customers if customers is None else customers)
+            self.random.shuffle(order)
+            for u in order:
+                for v in self.neighbours[u]:
+                    if self.relocate(routes, where, u, v) or self.exchange(routes, where, u, v) \
+                            or self.two_opt_star(routes, where, u, v):
+                        improved = True
+                        where = self.positions(routes)
+                        break
+        routes[:] = [route for route in routes if len(route.nodes) > 2]
+
+    @staticmethod
+    def positions(routes):
+        """
+        客户 -> (路线, 位置)
+        """
+        where = {}
+        for route in routes:
+            for p, node in enumerate(route.nodes):
+                if node != 0:
+                    where[node] = (route, p)
+        return where
+
+    def relocate(self, routes, where, u, v):
+        """
+        把客户u移动到客户v之前
+        """
+        r1, p1 = where[u]
+        r2, p2 = where[v]
+        dist = self.dist
+        a, b = r1.nodes[p1 - 1], r1.nodes[p1 + 1]
+        gain = dist[a][u] + dist[u][b] - dist[a][b]
+        if r1 is r2:
+            if p2 == p1 + 1:
+                return False
+            nodes = list(r1.nodes)
+            nodes.pop(p1)
+            nodes.insert(p2 if p2 < p1 else p2 - 1, u)
+            candidate = self.make_route(nodes)
+            if candidate.cost < r1.cost - 1e-9 and self.route_feasible(candidate):
+                r1.nodes = nodes
+                self.update(r1)
+                return True
+            return False
+        if r2.load + self.demand[u] > self.capacity:
+            return False
+        delta = self.can_insert(r2, p2, u)
+        if delta is None or delta - gain >= -1e-9 or not self.can_remove(r1, p1):
+            return False
+        r1.nodes.pop(p1)
+        r2.nodes.insert(p2, u)
+        self.update(r1)
+        self.update(r2)
+        if len(r1.nodes) == 2:
+            routes.remove(r1)
+        return True
+
+    def exchange(self, routes, where, u, v):
+        """
+        交换不同路线上的客户u与v
+        """
+        r1, p1 = where[u]
+        r2, p2 = where[v]
+        if r1 is r2:
+            return False
+        demand = self.demand
+        if r1.load - demand[u] + demand[v] > self.capacity or r2.load - demand[v] + demand[u] > self.capacity:
+            return False
+        dist = self.dist
+        a, b = r1.nodes[p1 - 1], r1.nodes[p1 + 1]
+        c, d = r2.nodes[p2 - 1], r2.nodes[p2 + 1]
+        delta = (dist[a][v] + dist[v][b] - dist[a][u] - dist[u][b]
+                 + dist[c][u] + dist[u][d] - dist[c][v] - dist[v][d])
+        if delta >= -1e-9 or not self.can_replace(r1, p1, v) or not self.can_replace(r2, p2, u):
+            return False
+        r1.nodes[p1], r2.nodes[p2] = v, u
+        self.update(r1)
+        self.update(r2)
+        return True
+
+    def two_opt_star(self, routes, where, u, v):
+        """
+        2-opt*: 交换两条路线的尾部, 使u直接连接到v
+        r1 = [.., u | x, ..], r2 = [.., w | v, ..] -> [.., u, v, ..], [.., w, x, ..]
+        """
+        r1, p1 = where[u]
+        r2, p2 = where[v]
+        if r1 is r2:
+            return False
+        dist = self.dist
+        x = r1.nodes[p1 + 1]
+        w = r2.nodes[p2 - 1]
+        delta = dist[u][v] + dist[w][x] - dist[u][x] - dist[w][v]
+        if delta >= -1e-9:
+            return False
+        # 容量
+        if r1.prefix_load[p1] + r2.load - r2.prefix_load[p2 - 1] > self.capacity:
+            return False
+        if r2.prefix_load[p2 - 1] + r1.load - r1.prefix_load[p1] > self.capacity:
+            return False
+        # 时间窗
+        start_v = max(self.ready[v], r1.start[p1] + self.service[u] + dist[u][v])
+        if start_v > r2.latest[p2]:
+            return False
+        start_x = max(self.ready[x], r2.start[p2 - 1] + self.service[w] + dist[w][x])
+        if start_x > r1.latest[p1 + 1]:
+            return False
+        head1, tail1 = r1.nodes[:p1 + 1], r1.nodes[p1 + 1:]
+        head2, tail2 = r2.nodes[:p2], r2.nodes[p2:]
+        r1.nodes = head1 + tail2
+        r2.nodes = head2 + tail1
+        self.update(r1)
+        self.update(r2)
+        if len(r2.nodes) == 2:
+            routes.remove(r2)
+        return True
+
+    def route_feasible(self, route):
+        return route.load <= self.capacity and all(
+            start <= self.due[node] for start, node in zip(route.start, route.nodes))
+
+    # ------------------------------------------------------------------
+    # 主循环
+    # ------------------------------------------------------------------
+    def select(self, weights):
+        """
+        轮盘赌选择算子
+        """
+        pick = self.random.random() * sum(weights)
+        for index, weight in enumerate(weights):
+            pick -= weight
+            if pick <= 0:
+                return index
+        return len(weights) - 1
+
+    def solve(self, initial_routes=None):
+        """
+        求解
+        :param initial_routes: 初始路线列表(节点序列), 默认由SolomonInsertion构造
+        :return: {车辆编号: [(i, j), ...]}, 与Model.extract_solution格式一致
+        """
+        started = time.time()
+        if initial_routes is None:
+            initial_routes = SolomonInsertion(self.instance).solve()
+        current = [self.make_route(list(nodes)) for nodes in initial_routes if len(nodes) > 2]
+        self.local_search(current)
+        current_cost = self.total_cost(current)
+        best, best_cost = self.copy(current), current_cost
+
+        num_customers = len(self.customers)
+        q_min = min(4, num_customers)
+        q_max = max(q_min, min(60, int(0.25 * num_customers)))
+
+        # 模拟退火: 初始温度使差5%的解以0.5的概率被接受, 按迭代或时间进度指数降温到初始值的0.2%
+        initial_temperature = 0.05 * current_cost / math.log(2) if current_cost > 0 else 1.0
+
+        destroy_weights = [1.0] * len(self.destroy_operators)
+        repair_weights = [1.0] * len(self.repair_operators)
+        destroy_scores = [0.0] * len(self.destroy_operators)
+        repair_scores = [0.0] * len(self.repair_operators)
+        destroy_uses = [0] * len(self.destroy_operators)
+        repair_uses = [0] * len(self.repair_operators)
+
+        for iteration in range(1, self.iterations + 1):
+            progress = iteration / self.iterations
+            if self.time_limit is not None:
+                elapsed = time.time() - started
+                if elapsed > self.time_limit:
+                    break
+                progress = max(progress, elapsed / self.time_limit)
+            temperature = initial_temperature * 0.002 ** progress
+
+            d = self.select(destroy_weights)
+            r = self.select(repair_weights)
+            destroy_uses[d] += 1
+            repair_uses[r] += 1
+
+            candidate = self.copy(current)
+            removed = self.destroy_operators[d](candidate, self.random.randint(q_min, q_max))
+            if self.repair_operators[r](candidate, removed):
+                cost = self.total_cost(candidate)
+                score = 0.0
+                if cost < best_cost - 1e-9:
+                    self.local_search(candidate, removed)
+                    cost = self.total_cost(candidate)
+                    best, best_cost = self.copy(candidate), cost
+                    current, current_cost = candidate, cost
+                    score = self.scores[0]
+                elif cost < current_cost - 1e-9:
+                    current, current_cost = candidate, cost
+                    score = self.scores[1]
+                elif self.random.random() < math.exp(-(cost - current_cost) / temperature):
+                    current, current_cost = candidate, cost
+                    score = self.scores[2]
+                destroy_scores[d] += score
+                repair_scores[r] += score
+
+            # 按周期更新算子权重
+            if iteration % self.segment == 0:
+                for weights, scores, uses in ((destroy_weights, destroy_scores, destroy_uses),
+                                              (repair_weights, repair_scores, repair_uses)):
+                    for index in range(len(weights)):
+                        if uses[index]:
+                            weights[index] = ((1 - self.reaction) * weights[index]
+                                              + self.reaction * scores[index] / uses[index])
+                        weights[index] = max(weights[index], 0.01)
+                        scores[index], uses[index] = 0.0, 0
+
+        self.best_routes = [route.nodes for route in best]
+        self.best_cost = best_cost
+        return self.to_solution(self.best_routes)
+
+    def to_solution(self, routes):
+        """
+        节点序列 -> {车辆编号: [(i, j), ...]}
+        """
+        solution = {k: [] for k in range(max(self.num_vehicles, len(routes)))}
+        for k, nodes in enumerate(routes):
+            solution[k] = list(zip(nodes[:-1], nodes[1:]))
+        return solution
@@ -0,0 +1,112 @@
+class SolomonInsertion:
+    """
+    Solomon I1插入启发式
+    逐条构造路线: 以距depot最远的未访问客户为种子, 反复把c2准则最优的客户插入到c1准则最优的位置,
+    无可行插入时开启新路线
+    """
+    def __init__(self, instance, mu=1.0, alpha1=1.0, lam=1.0):
+        """
+        :param instance: 算例数据
+        :param mu: c11中原有弧长度的权重
+        :param alpha1: c1中距离增量c11的权重, 时间推移c12的权重为1 - alpha1
+        :param lam: c2中客户到depot距离的权重
+        """
+        self.instance = instance  # 算例数据
+        self.mu = mu
+        self.alpha1 = alpha1
+        self.alpha2 = 1.0 - alpha1
+        self.lam = lam
+
+    def solve(self):
+        """
+        构造初始解
+        :return: 路线列表, 每条路线为以depot开始和结束的节点序列, 如[[0, 5, 3, 0], ...]
+        """
+        instance = self.instance
+        dist = instance.distance
+        unrouted = set(range(1, instance.n))
+        routes = []
+
+        while unrouted:
+            # 选择距depot最远的客户作为种子
+            seed = max(unrouted, key=lambda u: dist[0, u])
+            unrouted.remove(seed)
+            route = [0, seed, 0]
+            if not self.feasible(route):
+                # 单独服务也不可行的客户, 仍单独成一条路线
+                routes.append(route)
+                continue
+
+            while unrouted:
+                start, latest, load = self.schedule(route)
+                best_customer, best_position, best_c2 = None, None, None
+                for u in unrouted:
+                    if load + instance.demand[u] > instance.capacity:
+                        continue
+                    position, c1 = self.best_insertion(route, start, latest, u)
+                    if position is None:
+                        continue
+                    c2 = self.lam * dist[0, u] - c1
+                    if best_c2 is None or c2 > best_c2:
+                        best_customer, best_position, best_c2 = u, position, c2
+                if best_customer is None:
+                    break
+                route.insert(best_position, best_customer)
+                unrouted.remove(best_customer)
+            routes.append(route)
+
+        return routes
+
+    def schedule(self, route):
+        """
+        计算路线上每个位置的开始服务时间, 最晚开始服务时间与总负载
+        最晚开始服务时间由路线末端向前递推, 用于O(1)判断插入可行性
+        :param route: 节点序列
+        :return: (开始服务时间列表, 最晚开始服务时间列表, 总负载)
+        """
+        instance = self.instance
+        start, load = instance.route_schedule(route)
+        latest = [0.0] * len(route)
+        latest[-1] = instance.due_date[route[-1]]
+        for p in range(len(route) - 2, -1, -1):
+            i, j = route[p], route[p + 1]
+            latest[p] = min(instance.due_date[i],
+                            latest[p + 1] - instance.service_time[i] - instance.travel_time[i, j])
+        return start, latest, load[-1]
+
+    def best_insertion(self, route, start, latest, u):
+        """
+        计算客户u在路线中的最优插入位置
+        :return: (插入位置, c1值), 不可插入时位置为None
+        """
+        instance = self.instance
+        dist = instance.distance
+        travel_time = instance.travel_time
+        service_time = instance.service_time
+        best_position, best_c1 = None, None
+        for p in range(1, len(route)):
+            i, j = route[p - 1], route[p]
+            # 在u处的开始服务时间
+            start_u = max(instance.ready_time[u], start[p - 1] + service_time[i] + travel_time[i, u])
+            if start_u > instance.due_date[u]:
+                continue
+            # j处新的开始服务时间
+            start_j = max(instance.ready_time[j], start_u + service_time[u] + travel_time[u, j])
+            if start_j > latest[p]:
+                continue
+            c11 = dist[i, u] + dist[u, j] - self.mu * dist[i, j]
+            c12 = start_j - start[p]
+            c1 = self.alpha1 * c11 + self.alpha2 * c12
+            if best_c1 is None or c1 < best_c1:
+                best_position, best_c1 = p, c1
+        return best_position, best_c1
+
+    def feasible(self, route):
+        """
+        检查路线是否满足容量和时间窗约束
+        """
+        instance = self.instance
+        start, load = instance.route_schedule(route)
+        if load[-1] > instance.capacity:
+            return False
+        return all(start[p] <= instance.due_date[node] for p, node in enumerate(route))
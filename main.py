@@ -1,17 +1,35 @@
-from read.Read import Read
+import asyncio
+import json
+
 from model.Model import Model
+from model.TwoIndexModel import TwoIndexModel
+from model.FleetMinimization import FleetMinimization
 from draw.DrawMap import DrawMap
-
-def solve_C101():
-    # 读取数据
-    vehicle_data, customer_data = Read.read_instance('D:\Project\OR_Experiment1\data\solomon_100\C101.txt')
+from batch.BatchSolver import BatchSolver
+from batch.AsyncSolver import AsyncSolver
+from benchmark.Benchmark import Benchmark
+from heuristic.ALNS import ALNS
+from colgen.BranchAndPrice import BranchAndPrice
+from read.InstanceRegistry import InstanceRegistry
+from store.ResultStore import ResultStore
+
+# 可选的模型形式: 三下标(按车辆区分)与两下标(车辆对称)
+MODELS = {'three_index': Model,
+          'two_index': TwoIndexModel}
+
+def solve_C101(formulation='three_index'):
+    # 读取数据, 算例由共享的注册表加载
+    instance = InstanceRegistry.shared('data').get('C101')
 
     # 实例化
-    model = Model(vehicle_data, customer_data)
+    model = MODELS[formulation].from_instance(instance)
 
     # 构建模型
     model.build_model()
 
+    # 使用插入启发式构造初始解
+    model.warm_start()
+
     # 求解
     solution = model.optimize()
 
@@ -23,32 +41,39 @@ def solve_C101():
             for i, j in route:
                 print(f"  {i} -> {j}")
 
-        # 创建绘图对象并显示结果
-        draw_map = DrawMap(customer_data, vehicle_data)
-
-        # 显示图形
-        draw_map.show_figure(solution, "VRPTW Solution Visualization")
+        # 创建绘图对象并显示结果, 与模型共享同一算例
+        draw_map = DrawMap.from_instance(instance)
 
-        # 保存图形
-        draw_map.save_figure(solution, "result/vrp_solution.png")
+        # 显示并保存图形, 同一张图只绘制一次
+        draw_map.show_figure(solution, "VRPTW Solution Visualization", "result/vrp_solution.png")
     else:
         print("No optimal solution found")
 
-def solve_all_instances():
-    # 读取数据
-    data = Read('data')
-    for path in data.file_path_list():
-        print(f"Solving instance: {path}")
-
+def solve_all_instances(formulation='three_index'):
+    # 读取数据, 目录只遍历一次, 算例按需加载
+    registry = InstanceRegistry.shared('data')
+    # 结果库, 键为算例内容哈希与配置
+    store = ResultStore('result/store')
+    config = {'model': formulation, 'time_limit': 300}
+    for path in registry.file_paths:
         # 读取数据
-        vehicle_data, customer_data = Read.read_instance(path)
+        instance = registry.get(path)
+        name = registry.name(path)
+
+        # 已求得最优解的算例直接跳过
+        if store.solved(instance, config):
+            print(f"Skipping solved instance: {path}")
+            continue
+        print(f"Solving instance: {path}")
 
         # 创建VRP模型
-        model = Model(vehicle_data, customer_data)
+        model = MODELS[formulation].from_instance(instance)
 
-        # 构建并求解模型
+        # 构建并求解模型, 以之前保存的解(如有)作为初始解
         model.build_model()
-        solution = model.optimize(300) # 时间限制300s
+        model.warm_start(store.routes(instance, config))
+        solution = model.optimize(config['time_limit']) # 时间限制300s
+        store.put_model(instance, config, model, name)
 
         # 输出结果
         if solution:
@@ -59,16 +84,168 @@ def solve_all_instances():
                     print(f"  {i} -> {j}")
 
             # 创建绘图对象并显示结果
-            draw_map = DrawMap(customer_data, vehicle_data)
-
-            # 显示图形
-            draw_map.show_figure(solution, "VRPTW Solution Visualization")
+            draw_map = DrawMap.from_instance(instance)
 
-            # 保存图形（可选）
-            draw_map.save_figure(solution, "result/vrp_solution.png")
+            # 显示并保存图形, 同一张图只绘制一次
+            draw_map.show_figure(solution, f"{name} VRPTW Solution", f"result/{name}.png")
         else:
             print(f"No optimal solution found for instance: {path}")
 
+def solve_alns(path, time_limit=30):
+    # 读取数据
+    instance = InstanceRegistry.shared('data').get(path)
+
+    # 使用自适应大邻域搜索求解, 返回与Model.extract_solution相同的格式
+    alns = ALNS(instance, iterations=100000, time_limit=time_limit)
+    solution = alns.solve()
+
+    # 输出
+    print(f"Total distance: {alns.best_cost:.2f}")
+    for vehicle_id, route in solution.items():
+        if route:
+            print(f"Vehicle {vehicle_id} route:")
+            for i, j in route:
+                print(f"  {i} -> {j}")
+
+    # 保存图形
+    draw_map = DrawMap.from_instance(instance)
+    draw_map.save_figure(solution, "result/vrp_solution.png")
+
+def solve_large_instances(data_path='data/gehring_homberger', time_limit=60):
+    # Gehring-Homberger算例(200-1000客户)使用ALNS求解, 不构建按车辆展开的MIP模型
+    registry = InstanceRegistry(data_path, max_size=1)  # 只保留当前算例
+    for name in registry.names():
+        instance = registry.get(name)
+        alns = ALNS(instance, iterations=100000, time_limit=time_limit)
+        solution = alns.solve()
+        used = sum(1 for route in solution.values() if route)
+        print(f"{name}: {instance.n - 1} customers, {used} vehicles, total distance {alns.best_cost:.2f}")
+
+def solve_branch_and_price(path, time_limit=300):
+    # 读取数据
+    instance = InstanceRegistry.shared('data').get(path)
+
+    # 使用分支定价求解
+    solver = BranchAndPrice(instance, time_limit=time_limit)
+    solution = solver.solve()
+
+    # 输出
+    if solution:
+        print(f"Total distance: {solver.best_cost:.2f}, lower bound: {solver.bound:.2f}, nodes: {solver.nodes}")
+        for vehicle_id, route in solution.items():
+            if route:
+                print(f"Vehicle {vehicle_id} route:")
+                for i, j in route:
+                    print(f"  {i} -> {j}")
+    else:
+        print(f"No solution found for instance: {path}")
+
+def solve_until_gap(path, gap=0.05, time_limit=300):
+    # 流式读取incumbent, 相对间隙达到gap时立即返回, 不必等满时间限制
+    instance = InstanceRegistry.shared('data').get(path)
+    model = Model.from_instance(instance)
+    model.build_model()
+    model.warm_start()
+
+    incumbent = None
+    for incumbent in model.optimize_stream(time_limit):
+        current_gap = (incumbent['objective'] - incumbent['bound']) / max(abs(incumbent['objective']), 1e-9)
+        print(f"{incumbent['runtime']:.1f}s: objective {incumbent['objective']:.2f}, gap {current_gap:.2%}")
+        if current_gap <= gap:
+            break
+
+    if incumbent is None:
+        print(f"No solution found for instance: {path}")
+        return None
+    for vehicle_id, route in incumbent['routes'].items():
+        print(f"Vehicle {vehicle_id} route: {' -> '.join(map(str, route))}")
+    return incumbent
+
+def solve_fleet_first(path, fleet_time_limit=60, time_limit=300):
+    # 先最小化车辆数, 再在收缩后的车队上最小化距离
+    instance = InstanceRegistry.shared('data').get(path)
+    solver = FleetMinimization(instance, fleet_time_limit, time_limit)
+    solution = solver.solve()
+
+    if solution:
+        print(f"Vehicles: {solver.fleet}, total distance: {solver.model.model.ObjVal:.2f}")
+        for vehicle_id, route in solution.items():
+            if route:
+                print(f"Vehicle {vehicle_id} route:")
+                for i, j in route:
+                    print(f"  {i} -> {j}")
+    else:
+        print(f"No solution found for instance: {path}")
+    return solution
+
+def solve_sized(path, time_limit=300, symmetry='usage', fleet=False):
+    # 车辆数收缩为插入启发式的路线数, 并处理车辆对称性('usage', 'lowest_index'或'orbital')
+    # 只以距离为目标时车辆数的收缩是启发式的限制, fleet=True(先车辆数后距离)时不影响最优性
+    instance = InstanceRegistry.shared('data').get(path)
+    model = Model.sized(instance)
+    restriction = "exact for the fleet-first objective" if fleet else "heuristic restriction"
+    print(f"Vehicles: {model.num_vehicles} ({restriction}; lower bound {model.sizing.lower_bound}, "
+          f"original {instance.num_vehicles})")
+    model.build_model(fleet=fleet, symmetry=symmetry)
+    model.warm_start()
+    solution = model.optimize(time_limit)
+
+    if solution:
+        scope = "" if fleet else f" (optimal only within {model.num_vehicles} vehicles)"
+        print(f"Total distance: {model.distance():.2f}{scope}")
+    else:
+        print(f"No solution found for instance: {path}")
+    return solution
+
+def profile_instance(path, time_limit=60, log_path='result/solver_events.jsonl'):
+    # 记录建模各阶段(变量, 目标函数, 各约束族)的耗时与规模, 以及求解进度事件
+    instance = InstanceRegistry.shared('data').get(path)
+    model = Model.from_instance(instance)
+    profiler = model.profile()
+    with open(log_path, 'w') as log:
+        profiler.subscribe(lambda event: log.write(json.dumps(event) + '\n'))
+        model.build_model()
+        model.optimize(time_limit)
+
+    for event in profiler.phases():
+        print(f"{event['name']:<20} {event['seconds']:8.3f}s  rows {event.get('rows', '-')}, "
+              f"nonzeros {event.get('nonzeros', '-')}")
+    return profiler
+
+def solve_all_instances_parallel(formulation='three_index', processes=4, time_limit=300):
+    # 使用进程池并行求解所有算例, 每个进程的Gurobi线程数按CPU核数平均分配
+    batch = BatchSolver('data', processes=processes, time_limit=time_limit,
+                        model_class=MODELS[formulation])
+    batch.solve()
+
+    # 保存结果表, 并无界面导出所有路线图
+    batch.save_csv('result/batch_results.csv')
+    batch.export_figures('result/figures')
+
+def run_benchmark(baseline=None, time_limit=60):
+    # 基准测试solomon_100中有最优已知解的C类算例, 结果保存为CSV与JSON, 给定基线时输出回退的算例
+    benchmark = Benchmark('data/solomon_100', time_limit=time_limit)
+    benchmark.run()
+    if baseline is not None:
+        regressions = benchmark.compare(baseline)
+        print(f"Regressions: {', '.join(regressions) if regressions else 'none'}")
+    benchmark.save_csv('result/benchmark.csv')
+    benchmark.save_json('result/benchmark.json')
+
+async def solve_concurrently(names, workers=4, time_limit=60):
+    # 在事件循环中并发提交多个求解请求, 同时最多workers个请求在求解
+    async with AsyncSolver('data', workers=workers, time_limit=time_limit) as solver:
+        results = await solver.solve_all(names)
+    for result in results:
+        print(f"Solved instance: {result['instance']}, objective: {result['objective']}, "
+              f"runtime: {result['runtime']:.2f}s")
+    return results
+
+def run_concurrently(names, workers=4, time_limit=60):
+    # 同步入口: 在新的事件循环中运行solve_concurrently
+    return asyncio.run(solve_concurrently(names, workers, time_limit))
+
 if __name__ == '__main__':
     solve_C101()
-    # solve_all_instances()
\ No newline at end of file
+    # solve_all_instances()
+    # run_concurrently(['C101', 'R101', 'RC101'])
\ No newline at end of file
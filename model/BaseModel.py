@@ -0,0 +1,156 @@
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+from model.Profiler import Profiler
+from read.Instance import Instance
+
+
+class BaseModel:
+    """
+    CVRPTW模型的公共部分
+    三下标模型(Model)与两下标模型(TwoIndexModel)共用算例, 回调, 求解与解的提取,
+    子类只需实现build_model, warm_start与decode_routes
+    """
+    NAME = "VRP"  # Gurobi模型名
+    KEY_SIZE = 3  # x的下标长度, 三下标为(i, j, k), 两下标为(i, j)
+    DISTANCE_OBJECTIVE = 1  # 词典序目标(fleet=True)中距离目标的序号
+
+    def __init__(self, vehicle_data, customer_data, instance=None, env=None, num_vehicles=None):
+        """
+        :param vehicle_data: 车辆数据
+        :param customer_data: 客户数据
+        :param instance: 已构建的算例, 给定时直接共享, 不再重新构建
+        :param env: Gurobi环境, 默认使用全局环境; 多线程同时求解时每个线程应使用独立的环境
+        :param num_vehicles: 车辆数量, 默认为vehicle_data['number'], 可以收缩为已知的车队规模
+        """
+        self.vehicle_data = vehicle_data  # 车辆数据
+        self._customer_data = customer_data  # 客户数据, 由算例创建时为None
+        self.instance = instance or Instance(vehicle_data, customer_data)  # 算例数组与距离矩阵
+        self.n = self.instance.n  # 客户数量
+        self.num_vehicles = num_vehicles or vehicle_data['number']  # 车辆数量
+        self.model = gp.Model(self.NAME, env=env)  # 创建模型
+        self.x = None  # 决策变量
+        self.load = None  # 负载变量
+        self.arrival_time = None  # 到达时间变量
+        self.callbacks = []  # 求解回调, 每个回调为callable(model, where)
+        self._x_vars = None  # x变量列表, 用于批量读取取值
+        self._x_keys = None  # 与_x_vars对应的下标数组
+        self.profiler = Profiler(enabled=False)  # 计时与事件
+
+    @classmethod
+    def from_instance(cls, instance, env=None, num_vehicles=None):
+        """
+        由已构建的算例(如InstanceRegistry中的共享算例)创建模型
+        """
+        return cls(instance.vehicle_data, None, instance, env, num_vehicles)
+
+    @property
+    def customer_data(self):
+        """
+        客户数据列表, 由算例创建的模型在访问时才从算例生成, 大算例建模时不构建客户字典
+        """
+        if self._customer_data is None:
+            return self.instance.customer_data
+        return self._customer_data
+
+    def callback(self, model, where):
+        """
+        依次调用已注册的回调
+        """
+        for callback in self.callbacks:
+            callback(model, where)
+
+    def optimize(self, time_limit=None, threads=None):
+        """
+        优化模型并返回解决方案
+        :param time_limit: 优化时间限制, 单位为秒, 默认为None(不设置时间限制)
+        :param threads: 求解线程数, 默认为None(由Gurobi决定)
+        :return: 当前最优解
+        """
+        # 设置时间限制
+        if time_limit is not None:
+            self.model.setParam('TimeLimit', time_limit)
+
+        # 设置线程数
+        if threads is not None:
+            self.model.setParam('Threads', threads)
+
+        # 开始
+        with self.profiler.phase('optimize'):
+            if self.callbacks:
+                self.model.optimize(self.callback)
+            else:
+                self.model.optimize()
+
+        # 检查状态
+        if self.model.status == GRB.OPTIMAL or (self.model.status == GRB.TIME_LIMIT and self.model.SolCount > 0):
+            # 如果达到时间限制但找到了可行解，也返回当前最佳解
+            with self.profiler.phase('extract'):
+                return self.extract_solution()
+        return None
+
+    def distance(self):
+        """
+        当前解的总距离; 词典序目标下ObjVal是第一目标(车辆数), 需读取距离目标的ObjNVal
+        """
+        if self.model.NumObj > 1:
+            self.model.setParam('ObjNumber', self.DISTANCE_OBJECTIVE)
+            return self.model.ObjNVal
+        return self.model.ObjVal
+
+    def objective_summary(self):
+        """
+        结果中记录的目标值, 界与MIP间隙, objective始终为总距离;
+        词典序目标下ObjBound与MIPGap不对应距离目标, 记为None
+        :return: {'objective', 'bound', 'gap'}, 无解时均为None
+        """
+        if self.model.SolCount == 0:
+            return {'objective': None, 'bound': None, 'gap': None}
+        if self.model.NumObj > 1:
+            return {'objective': self.distance(), 'bound': None, 'gap': None}
+        return {'objective': self.model.ObjVal, 'bound': self.model.ObjBound, 'gap': self.model.MIPGap}
+
+    def extract_solution(self):
+        """
+        :return: {车辆编号: [(i, j), ...]}, 弧按行驶顺序排列
+        """
+        routes = {k: [] for k in range(self.num_vehicles)}
+        for k, nodes in self.decode_routes(self.solution_values()).items():
+            routes[k] = list(zip(nodes[:-1], nodes[1:]))
+        return routes
+
+    def extract_routes(self):
+        """
+        提取有序路线及沿路线的开始服务时间与负载
+        时间与负载由instance.route_schedule按最早开始服务计算, 惰性约束模式下同样可用
+        :return: {车辆编号: {'route': [0, ..., 0], 'arrival': [...], 'load': [...]}}, 只包含被使用的车辆
+        """
+        routes = {}
+        for k, nodes in self.decode_routes(self.solution_values()).items():
+            arrival, load = self.instance.route_schedule(nodes)
+            routes[k] = {'route': nodes, 'arrival': arrival, 'load': load}
+        return routes
+
+    def solution_values(self):
+        """
+        一次批量读取所有x变量的取值
+        :return: 取值数组, 顺序与self.x.keys()一致
+        """
+        return np.asarray(self.model.getAttr('X', self.x_vars()))
+
+    def x_vars(self):
+        """
+        x变量列表与对应的下标数组, 首次调用时生成并缓存
+        """
+        if self._x_vars is None or len(self._x_vars) != len(self.x):
+            self._x_vars = list(self.x.values())
+            self._x_keys = np.array(list(self.x.keys()), dtype=np.int64).reshape(-1, self.KEY_SIZE)
+        return self._x_vars
+
+    def decode_routes(self, values):
+        """
+        由x的取值向量还原各车辆的节点序列
+        :param values: 取值向量, 顺序与self.x.keys()一致
+        :return: {车辆编号: [0, ..., 0]}, 只包含被使用的车辆
+        """
+        raise NotImplementedError
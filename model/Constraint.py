@@ -1,19 +1,31 @@
 import gurobipy as gp
 from gurobipy import GRB
-import math
+
+from model.Profiler import Profiler
 
 
 class Constraint:
     """
     约束类
     """
-    def __init__(self, customer_data, x, load, vehicle_data, num_vehicles):
-        self.customer_data = customer_data  # 客户数据
+    def __init__(self, instance, x, load, num_vehicles, profiler=None):
+        self.instance = instance  # 算例数据
         self.x = x  # 决策变量
         self.load = load  # 负载
-        self.vehicle_data = vehicle_data  # 车辆数据
         self.num_vehicles = num_vehicles  # 车辆数量
-        self.n = len(customer_data)  # 客户数量
+        self.n = instance.n  # 客户数量
+        self.arrival_time = None  # 到达时间变量, 在add_constraints中创建
+        self.profiler = profiler or Profiler(enabled=False)  # 各约束族的计时
+        # 按下标保存的约束, 供增量修改使用
+        self.visit = {}  # j -> 客户访问约束
+        self.depot_out = {}  # k -> depot出发约束
+        self.flow_balance = {}  # (h, k) -> 流平衡约束
+        self.load_prop = {}  # (i, j, k) -> 负载传播约束
+        self.time_prop = {}  # (i, j, k) -> 时间传播约束
+        self.usage_order = {}  # k -> 车辆使用顺序约束
+        self.min_vehicles = 0  # 必须使用的车辆数(车辆数下界)
+        self.served = None  # (j, k) -> 车辆k服务的编号不超过j的客户数, 最小编号顺序约束使用
+        self.assignment_order = {}  # (j, k, 'served'/'order') -> 最小编号顺序约束
 
     def add_constraints(self, model):
         """
@@ -21,80 +33,155 @@ class Constraint:
         :param model:
         :return:
         """
+        with self.profiler.phase('routing_constraints', model):
+            self.add_routing_constraints(model)
+        with self.profiler.phase('load_constraints', model):
+            self.add_load_constraints(model)
+        with self.profiler.phase('time_constraints', model):
+            self.add_time_constraints(model)
+
+    def add_routing_constraints(self, model):
+        """
+        添加客户访问与车辆流平衡约束
+        :param model:
+        :return:
+        """
+        predecessors = self.instance.predecessors  # 可行前驱
+        successors = self.instance.successors  # 可行后继
+
         # 1. 客户访问约束：每个客户必须且只能被访问一次
         for j in range(1, self.n):  # 跳过depot(0)
-            model.addConstr(gp.quicksum(self.x[i, j, k]
-                                        for i in range(self.n)
-                                        for k in range(self.num_vehicles)) == 1,
-                            f"visit_customer_{j}")
+            self.visit[j] = model.addConstr(gp.quicksum(self.x[i, j, k]
+                                                        for i in predecessors[j]
+                                                        for k in range(self.num_vehicles)) == 1,
+                                            f"visit_customer_{j}")
 
         # 2. 车辆流平衡约束
         # 2.1 每辆车必须从depot出发
         for k in range(self.num_vehicles):
-            model.addConstr(gp.quicksum(self.x[0, j, k] for j in range(1, self.n)) <= 1,
-                            f"depot_out_{k}")
+            self.depot_out[k] = model.addConstr(gp.quicksum(self.x[0, j, k] for j in successors[0]) <= 1,
+                                                f"depot_out_{k}")
 
         # 2.2 流入流出平衡：对于每个节点，进入的车辆数等于离开的车辆数
         for h in range(self.n):
             for k in range(self.num_vehicles):
-                model.addConstr(
-                    gp.quicksum(self.x[i, h, k] for i in range(self.n)) ==
-                    gp.quicksum(self.x[h, j, k] for j in range(self.n)),
+                self.flow_balance[h, k] = model.addConstr(
+                    gp.quicksum(self.x[i, h, k] for i in predecessors[h]) ==
+                    gp.quicksum(self.x[h, j, k] for j in successors[h]),
                     f"flow_balance_{h}_{k}")
 
+    def add_load_constraints(self, model):
+        """
+        添加容量约束
+        :param model:
+        :return:
+        """
+        arcs = [(i, j) for i, j in self.instance.arcs if j != 0]  # 进入客户的可行弧
+
         # 3. 容量约束
-        # 3.1 初始化depot的负载
-        for k in range(self.num_vehicles):
-            model.addConstr(self.load[0, k] == 0, f"init_load_{k}")
-
-        # 3.2 负载传播与容量限制
-        for i in range(self.n):
-            for j in range(1, self.n):  # j从1开始，跳过depot
-                for k in range(self.num_vehicles):
-                    M = self.vehicle_data['capacity']  # 大M
-                    model.addConstr(
-                        self.load[j, k] >= self.load[i, k] + self.customer_data[j]['demand'] - M * (1 - self.x[i, j, k]),
-                        f"load_prop_{i}_{j}_{k}")
-
-        # 3.3 确保不超过车辆容量
-        for i in range(self.n):
+        # 3.1 depot负载为0与容量上限已作为load变量的上下界(instance.load_lb/load_ub)
+
+        # 3.2 负载传播: 使用逐弧的大M, M_ij <= 0 的约束已被变量上下界蕴含, 直接跳过
+        demand = self.instance.demand
+        load_big_m = self.instance.load_big_m
+        for i, j in arcs:  # 跳过返回depot的弧
+            M = load_big_m[i, j]
+            if M <= 0:
+                continue
             for k in range(self.num_vehicles):
-                model.addConstr(
-                    self.load[i, k] <= self.vehicle_data['capacity'],
-                    f"capacity_{i}_{k}")
+                self.load_prop[i, j, k] = model.addConstr(
+                    self.load[j, k] >= self.load[i, k] + demand[j] - M * (1 - self.x[i, j, k]),
+                    f"load_prop_{i}_{j}_{k}")
+
+    def add_time_constraints(self, model):
+        """
+        添加时间窗约束
+        :param model:
+        :return:
+        """
+        arcs = [(i, j) for i, j in self.instance.arcs if j != 0]  # 进入客户的可行弧
 
         # 4. 时间窗约束
-        # 4.1 添加时间变量
-        arrival_time = model.addVars(self.n, self.num_vehicles,
+        # 4.1 添加时间变量, 时间窗[ready_i, due_i]直接作为变量上下界
+        ready_time = self.instance.ready_time
+        due_date = self.instance.due_date
+        keys = [(i, k) for i in range(self.n) for k in range(self.num_vehicles)]
+        arrival_time = model.addVars(keys,
+                                     lb={(i, k): ready_time[i] for i, k in keys},
+                                     ub={(i, k): due_date[i] for i, k in keys},
                                      vtype=GRB.CONTINUOUS, name="arrival_time")
+        self.arrival_time = arrival_time
 
-        # 4.2 设置到达时间约束
-        for i in range(self.n):
-            for j in range(1, self.n):  # j从1开始，跳过depot
-                for k in range(self.num_vehicles):
-                    # 计算从i到j的行驶时间
-                    travel_time = math.sqrt(
-                        (self.customer_data[i]['x'] - self.customer_data[j]['x']) ** 2 +
-                        (self.customer_data[i]['y'] - self.customer_data[j]['y']) ** 2
-                    )
-
-                    M = max(c['due_date'] for c in self.customer_data)  # Big-M值
-
-                    # 如果车辆k从i到j，则考虑时间窗约束
-                    model.addConstr(
-                        arrival_time[j, k] >=
-                        arrival_time[i, k] +
-                        self.customer_data[i]['service_time'] +
-                        travel_time -
-                        M * (1 - self.x[i, j, k]),
-                        f"time_window_prop_{i}_{j}_{k}")
-
-        # 4.3 确保在时间窗内到达
-        for i in range(1, self.n):  # 从1开始，跳过depot
+        # 4.2 设置到达时间约束: 逐弧的大M为 M_ij = max(0, due_i + s_i + t_ij - ready_j)
+        travel_time = self.instance.travel_time  # 行驶时间矩阵, 与k无关
+        service_time = self.instance.service_time
+        time_big_m = self.instance.time_big_m
+        for i, j in arcs:  # 跳过返回depot的弧
+            M = time_big_m[i, j]
+            if M <= 0:
+                continue
             for k in range(self.num_vehicles):
-                model.addConstr(
-                    arrival_time[i, k] >= self.customer_data[i]['ready_time'],
-                    f"early_time_{i}_{k}")
-                model.addConstr(
-                    arrival_time[i, k] <= self.customer_data[i]['due_date'],
-                    f"late_time_{i}_{k}")
\ No newline at end of file
+                # 如果车辆k从i到j，则考虑时间窗约束
+                self.time_prop[i, j, k] = model.addConstr(
+                    arrival_time[j, k] >=
+                    arrival_time[i, k] +
+                    service_time[i] +
+                    travel_time[i, j] -
+                    M * (1 - self.x[i, j, k]),
+                    f"time_window_prop_{i}_{j}_{k}")
+
+    def add_symmetry_constraints(self, model, min_vehicles=0, successors=None):
+        """
+        添加车辆使用顺序约束: 车辆相同, 要求编号小的车辆先被使用, 并且前min_vehicles辆车必须使用
+        已有的顺序约束会先删除, 增量修改depot的后继后可以重新调用
+        :param model:
+        :param min_vehicles: 车辆数下界, 如FleetSizing.demand_bound
+        :param successors: depot的可行后继, 默认为算例的successors[0]
+        :return:
+        """
+        if successors is None:
+            successors = self.instance.successors[0]
+        for row in self.usage_order.values():
+            model.remove(row)
+        self.usage_order = {}
+        self.min_vehicles = min_vehicles
+
+        used = [gp.quicksum(self.x[0, j, k] for j in successors) for k in range(self.num_vehicles)]
+        for k in range(self.num_vehicles):
+            if k < min_vehicles:
+                self.usage_order[k] = model.addConstr(used[k] >= 1, f"usage_order_{k}")
+            elif k > 0:
+                self.usage_order[k] = model.addConstr(used[k - 1] >= used[k], f"usage_order_{k}")
+
+    def add_assignment_order_constraints(self, model):
+        """
+        添加最小编号客户顺序约束: 车辆按所服务客户的最小编号排序
+        y_jk = sum_i x_ijk 表示车辆k服务客户j, 则车辆k服务j时车辆k-1必须服务某个编号小于j的客户:
+            y_jk <= sum_{i<j} y_{i,k-1}
+        右端用累计变量 served_jk = served_{j-1,k} + y_jk 表示, 避免每行包含所有更小编号客户的弧;
+        客户j只能由前j辆车服务(车辆k的最小编号客户至少为k+1), 其余x的上界直接设为0
+        :param model:
+        :return:
+        """
+        predecessors = self.instance.predecessors
+        K = self.num_vehicles
+        customers = range(1, self.n)
+
+        # 客户j只能由车辆0..j-1服务
+        for j in customers:
+            for k in range(j, K):
+                for i in predecessors[j]:
+                    self.x[i, j, k].UB = 0.0
+
+        visited = {(j, k): gp.quicksum(self.x[i, j, k] for i in predecessors[j])
+                   for j in customers for k in range(min(j, K))}
+        keys = [(j, k) for j in customers for k in range(K)]
+        self.served = model.addVars(keys, lb=0.0, ub={(j, k): j for j, k in keys},
+                                    vtype=GRB.CONTINUOUS, name="served")
+        for j, k in keys:
+            previous = self.served[j - 1, k] if j > 1 else 0
+            self.assignment_order[j, k, 'served'] = model.addConstr(
+                self.served[j, k] == previous + visited.get((j, k), 0), f"served_{j}_{k}")
+            if k > 0 and (j, k) in visited:
+                self.assignment_order[j, k, 'order'] = model.addConstr(
+                    visited[j, k] <= (self.served[j - 1, k - 1] if j > 1 else 0), f"assignment_order_{j}_{k}")
@@ -0,0 +1,50 @@
+from model.FleetSizing import FleetSizing
+from model.Model import Model
+from model.TwoIndexModel import TwoIndexModel
+
+
+class FleetMinimization:
+    """
+    车辆数优先的分层求解(Solomon的层次目标)
+    阶段1: 两下标模型没有车辆下标, 以词典序目标先最小化车辆数再最小化距离, 得到车队规模m与一组路线;
+    阶段2: 车辆数收缩为m的三下标模型, 以阶段1的路线为初始解最小化距离, 变量与约束只有原来的m/K
+    """
+    def __init__(self, instance, fleet_time_limit=60, time_limit=300, threads=None, env=None):
+        """
+        :param instance: 算例数据
+        :param fleet_time_limit: 阶段1的时间限制, 单位为秒
+        :param time_limit: 阶段2的时间限制, 单位为秒
+        :param threads: 求解线程数, 默认为None(由Gurobi决定)
+        :param env: Gurobi环境, 默认使用全局环境
+        """
+        self.instance = instance  # 算例数据
+        self.fleet_time_limit = fleet_time_limit
+        self.time_limit = time_limit
+        self.threads = threads
+        self.env = env
+        self.fleet = None  # 阶段1得到的车辆数
+        self.fleet_lower_bound = FleetSizing.demand_bound(instance)  # 容量下界
+        self.fleet_model = None  # 阶段1的两下标模型
+        self.model = None  # 阶段2的三下标模型
+
+    def solve(self):
+        """
+        依次求解两个阶段
+        :return: {车辆编号: [(i, j), ...]}, 与Model.extract_solution格式一致, 无解时返回None
+        """
+        # 阶段1: 最小化车辆数
+        self.fleet_model = TwoIndexModel.from_instance(self.instance, self.env)
+        self.fleet_model.build_model(fleet=True)
+        self.fleet_model.warm_start()
+        if self.fleet_model.optimize(self.fleet_time_limit, self.threads) is None:
+            return None
+        routes = list(self.fleet_model.decode_routes(self.fleet_model.solution_values()).values())
+        self.fleet = len(routes)
+        print(f"Fleet size: {self.fleet} (lower bound {self.fleet_lower_bound}, "
+              f"original {self.instance.num_vehicles})")
+
+        # 阶段2: 车辆数收缩为阶段1的结果, 最小化距离
+        self.model = Model.from_instance(self.instance, self.env, num_vehicles=self.fleet)
+        self.model.build_model(symmetry=True)
+        self.model.warm_start(routes)
+        return self.model.optimize(self.time_limit, self.threads)
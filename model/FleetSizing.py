@@ -0,0 +1,33 @@
+import math
+
+from heuristic.Insertion import SolomonInsertion
+
+
+class FleetSizing:
+    """
+    三下标模型的车辆数(K)确定
+    下界: ceil(总需求 / 容量), 任何可行解至少使用这么多车辆;
+    启发式车辆数: 插入启发式构造的路线数, 保证车辆数为K的模型有可行解;
+    模型的变量与大M约束都按K复制, 如C101由25辆车收缩为启发式的路线数
+    注意: 目标为总距离时, 距离最优解可能使用更多车辆, K取启发式车辆数是启发式的限制,
+    此时的OPTIMAL只是限制车队上的最优; 只有词典序目标(先车辆数, build_model(fleet=True))下
+    最优解的车辆数不超过启发式车辆数, 限制不影响最优性
+    """
+    def __init__(self, instance, routes=None):
+        """
+        :param instance: 算例数据
+        :param routes: 启发式路线, 默认由SolomonInsertion构造
+        """
+        self.instance = instance  # 算例数据
+        self.routes = routes if routes is not None else SolomonInsertion(instance).solve()  # 启发式路线, 可用作初始解
+        self.lower_bound = self.demand_bound(instance)  # 车辆数下界
+        self.heuristic_fleet = len(self.routes)  # 启发式车辆数, 只在词典序目标下是最优车辆数的上界
+        # 启发式路线多于可用车辆时仍使用算例给定的车辆数
+        self.num_vehicles = max(self.lower_bound, min(self.heuristic_fleet, instance.num_vehicles))
+
+    @staticmethod
+    def demand_bound(instance):
+        """
+        容量下界 ceil(总需求 / 容量)
+        """
+        return math.ceil(instance.demand.sum() / instance.capacity - 1e-9)
@@ -0,0 +1,230 @@
+import math
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from read.Instance import Instance
+
+
+class Incremental:
+    """
+    三下标模型的增量修改
+    每次修改先得到新的算例, 再与当前算例逐弧比较, 只修补受影响的部分:
+    1. 不再可行的弧: x的上界设为0, 变量保留以便之后恢复
+    2. 新增的可行弧: 恢复上界或新建变量, 重建其两端节点的访问/流平衡约束
+    3. 大M或需求变化的弧: 删除并重建对应的负载/时间传播约束
+    4. 需求或时间窗变化的节点: 更新load/arrival_time的上下界
+    被删除的客户保留节点编号, 其所有弧被屏蔽且访问约束右端改为0
+    """
+    def __init__(self, model):
+        """
+        :param model: 已用build_model()逐行构建的Model
+        """
+        if model.constraint is None or model.load is None:
+            raise ValueError("增量修改只支持逐行构建(build_model())的模型。")
+        if model.constraint.assignment_order:
+            raise ValueError("增量修改不支持最小编号客户顺序约束(symmetry='lowest_index')。")
+        self.model = model
+        self.removed = set()  # 已删除的客户
+        self.masked = set()  # 已在模型中屏蔽的客户
+        self.active = model.instance.arc_mask.copy()  # 当前使用的弧
+        self.load_rows = self.row_mask(model.constraint.load_prop)  # 已有负载传播约束的弧
+        self.time_rows = self.row_mask(model.constraint.time_prop)  # 已有时间传播约束的弧
+
+    def row_mask(self, rows):
+        mask = np.zeros((self.model.n, self.model.n), dtype=bool)
+        for i, j, k in rows:
+            mask[i, j] = True
+        return mask
+
+    @staticmethod
+    def pad(matrix, n):
+        """
+        把n0*n0矩阵补零扩展为n*n
+        """
+        if len(matrix) == n:
+            return matrix
+        padded = np.zeros((n, n), dtype=matrix.dtype)
+        padded[:len(matrix), :len(matrix)] = matrix
+        return padded
+
+    def apply(self, columns):
+        """
+        用修改后的列数组更新模型
+        :param columns: 新的列数组(见Instance.columns), 节点数不少于当前算例, 前n个节点的编号与当前算例一致
+        :return: 新的算例
+        """
+        model = self.model
+        old = model.instance
+        new = Instance.from_arrays(dict(old.vehicle_data), columns)
+        n_old, n = old.n, new.n
+        K = model.num_vehicles
+        gurobi_model = model.model
+        constraint = model.constraint
+
+        # 剩余客户的容量下界, sized()创建的模型车辆数不会增加, 超过K时模型必然不可行
+        removed = list(self.removed)
+        min_vehicles = math.ceil((new.demand.sum() - new.demand[removed].sum()) / new.capacity - 1e-9)
+        if model.sizing is not None and min_vehicles > K:
+            raise ValueError(f"修改后至少需要 {min_vehicles} 辆车, 超过收缩后的车辆数 {K}, "
+                             f"请用Model.sized()或Model.from_instance()重新建模。")
+
+        # 新节点的负载与时间变量
+        for j in range(n_old, n):
+            for k in range(K):
+                model.load[j, k] = gurobi_model.addVar(lb=new.load_lb[j], ub=new.load_ub[j],
+                                                       name=f"load[{j},{k}]")
+                model.arrival_time[j, k] = gurobi_model.addVar(lb=new.ready_time[j], ub=new.due_date[j],
+                                                               name=f"arrival_time[{j},{k}]")
+
+        # 已有节点的变量上下界
+        changed_nodes = np.zeros(n, dtype=bool)
+        changed_nodes[:n_old] = ((new.load_lb[:n_old] != old.load_lb) | (new.ready_time[:n_old] != old.ready_time)
+                                 | (new.due_date[:n_old] != old.due_date))
+        for j in np.flatnonzero(changed_nodes).tolist():
+            for k in range(K):
+                model.load[j, k].LB = new.load_lb[j]
+                model.arrival_time[j, k].LB = new.ready_time[j]
+                model.arrival_time[j, k].UB = new.due_date[j]
+
+        # 可行弧的变化
+        active = new.arc_mask.copy()
+        active[removed, :] = False
+        active[:, removed] = False
+        old_active = self.pad(self.active, n)
+        added = active & ~old_active
+        dropped = old_active & ~active
+
+        for i, j in zip(*(idx.tolist() for idx in np.nonzero(dropped))):
+            for k in range(K):
+                model.x[i, j, k].UB = 0.0
+        for i, j in zip(*(idx.tolist() for idx in np.nonzero(added))):
+            for k in range(K):
+                if (i, j, k) in model.x:
+                    model.x[i, j, k].UB = 1.0
+                else:
+                    model.x[i, j, k] = gurobi_model.addVar(vtype=GRB.BINARY, obj=new.distance[i, j],
+                                                           name=f"x[{i},{j},{k}]")
+
+        # 重建访问与流平衡约束: 新增弧的两端节点与新节点
+        rebuild = set(np.flatnonzero(added.any(axis=0) | added.any(axis=1)).tolist())
+        rebuild.update(range(n_old, n))
+        rebuild.update(self.removed - self.masked)  # 访问约束右端改为0
+        self.masked = set(self.removed)
+        predecessors = [np.flatnonzero(col).tolist() for col in active.T]
+        successors = [np.flatnonzero(row).tolist() for row in active]
+        for h in sorted(rebuild):
+            if h != 0:
+                rhs = 0 if h in self.removed else 1
+                self.replace(constraint.visit, h,
+                             gp.quicksum(model.x[i, h, k] for i in predecessors[h] for k in range(K)) == rhs,
+                             f"visit_customer_{h}")
+            for k in range(K):
+                self.replace(constraint.flow_balance, (h, k),
+                             gp.quicksum(model.x[i, h, k] for i in predecessors[h])
+                             == gp.quicksum(model.x[h, j, k] for j in successors[h]), f"flow_balance_{h}_{k}")
+        if 0 in rebuild:
+            for k in range(K):
+                self.replace(constraint.depot_out, k, gp.quicksum(model.x[0, j, k] for j in successors[0]) <= 1,
+                             f"depot_out_{k}")
+        if constraint.usage_order:
+            # 车辆使用顺序约束随depot的后继与剩余客户的容量下界更新, 只有K行
+            constraint.add_symmetry_constraints(gurobi_model, min_vehicles, successors[0])
+
+        # 负载传播约束: 大M或需求变化的弧重建
+        into_customer = active.copy()
+        into_customer[:, 0] = False
+        demand_changed = np.zeros(n, dtype=bool)
+        demand_changed[:n_old] = new.demand[:n_old] != old.demand
+        demand_changed[n_old:] = True
+        load_stale = added | (self.pad(old.load_big_m, n) != new.load_big_m) | demand_changed[None, :]
+        self.load_rows = self.pad(self.load_rows, n)
+        self.patch_rows(constraint.load_prop, self.load_rows, into_customer & (new.load_big_m > 0), load_stale,
+                        lambda i, j, k, M: model.load[j, k] >= model.load[i, k] + new.demand[j]
+                        - M * (1 - model.x[i, j, k]),
+                        new.load_big_m, "load_prop")
+
+        # 时间传播约束
+        time_stale = added | (self.pad(old.time_big_m, n) != new.time_big_m)
+        self.time_rows = self.pad(self.time_rows, n)
+        self.patch_rows(constraint.time_prop, self.time_rows, into_customer & (new.time_big_m > 0), time_stale,
+                        lambda i, j, k, M: model.arrival_time[j, k] >= model.arrival_time[i, k]
+                        + new.service_time[i] + new.travel_time[i, j] - M * (1 - model.x[i, j, k]),
+                        new.time_big_m, "time_window_prop")
+
+        self.active = active
+        model.instance = new
+        model.n = n
+        model._customer_data = None  # 客户数据改为从新算例生成
+        constraint.instance = new
+        constraint.n = n
+        return new
+
+    def replace(self, rows, key, temp_constr, name):
+        """
+        删除旧约束(如有)并添加新约束
+        """
+        gurobi_model = self.model.model
+        if key in rows:
+            gurobi_model.remove(rows[key])
+        rows[key] = gurobi_model.addConstr(temp_constr, name)
+
+    def patch_rows(self, rows, existing, target, stale, build, big_m, name):
+        """
+        修补一族传播约束
+        :param rows: (i, j, k) -> 约束
+        :param existing: 已有约束的弧, 原地更新
+        :param target: 修改后需要约束的弧
+        :param stale: 系数可能变化的弧
+        :param build: (i, j, k, M) -> 约束表达式
+        :param big_m: 修改后的大M矩阵
+        :param name: 约束名前缀
+        """
+        gurobi_model = self.model.model
+        K = self.model.num_vehicles
+        remove = existing & (stale | ~target)
+        for i, j in zip(*(idx.tolist() for idx in np.nonzero(remove))):
+            gurobi_model.remove([rows.pop((i, j, k)) for k in range(K)])
+        existing &= ~remove
+
+        for i, j in zip(*(idx.tolist() for idx in np.nonzero(target & ~existing))):
+            M = big_m[i, j]
+            for k in range(K):
+                rows[i, j, k] = gurobi_model.addConstr(build(i, j, k, M), f"{name}_{i}_{j}_{k}")
+        existing |= target
+
+    def routes(self, previous):
+        """
+        由修改前的路线构造修改后的初始解: 去掉已删除的客户, 修改后不可行的路线拆成单客户路线,
+        新客户各自单独成一条路线
+        :param previous: 修改前的路线列表, 每条为[0, ..., 0]
+        :return: 路线列表
+        """
+        instance = self.model.instance
+        routes, routed = [], set()
+        for nodes in previous:
+            nodes = [node for node in nodes if node not in self.removed]
+            customers = nodes[1:-1]
+            if not customers:
+                continue
+            routed.update(customers)
+            if self.feasible(nodes):
+                routes.append(nodes)
+            else:
+                routes.extend([0, c, 0] for c in customers)
+        for c in range(1, instance.n):
+            if c not in routed and c not in self.removed:
+                routes.append([0, c, 0])
+        return routes
+
+    def feasible(self, nodes):
+        """
+        路线在当前可行弧, 容量与时间窗下是否可行
+        """
+        instance = self.model.instance
+        if not all(self.active[i, j] for i, j in zip(nodes[:-1], nodes[1:])):
+            return False
+        arrival, load = instance.route_schedule(nodes)
+        return (load[-1] <= instance.capacity
+                and all(a <= instance.due_date[node] + 1e-6 for node, a in zip(nodes[1:-1], arrival[1:-1])))
@@ -0,0 +1,43 @@
+import math
+
+from gurobipy import GRB
+
+
+class IncumbentCallback:
+    """
+    新incumbent回调
+    在MIPSOL中读取新整数解, 由decode还原为路线后连同目标值, 界与求解时间交给sink;
+    与LazyCallback同时使用时, 被惰性约束拒绝的解(本次调用中添加了割)不会上报
+    """
+    def __init__(self, x_vars, decode, sink, lazy=None):
+        """
+        :param x_vars: x变量列表, 顺序与decode接受的取值向量一致
+        :param decode: 取值向量 -> {车辆编号: [0, ..., 0]}, 如Model.decode_routes
+        :param sink: 接收incumbent字典的函数, 如queue.Queue.put
+        :param lazy: 同一模型上的LazyCallback, 用于识别被拒绝的解
+        """
+        self.vars = x_vars
+        self.decode = decode
+        self.sink = sink
+        self.lazy = lazy
+        self.best = math.inf  # 已上报的最优目标值
+        self.count = 0  # 已上报的incumbent数
+
+    def __call__(self, model, where):
+        if where != GRB.Callback.MIPSOL:
+            return
+        if self.lazy is not None:
+            # LazyCallback先于本回调执行, 本次MIPSOL调用中添加了惰性割说明这个解被拒绝
+            if self.lazy.rejected:
+                return
+
+        objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        if objective >= self.best - 1e-9:
+            return
+        self.best = objective
+        self.count += 1
+        values = model.cbGetSolution(self.vars)
+        self.sink({'routes': self.decode(values),
+                   'objective': objective,
+                   'bound': model.cbGet(GRB.Callback.MIPSOL_OBJBND),
+                   'runtime': model.cbGet(GRB.Callback.RUNTIME)})
@@ -0,0 +1,172 @@
+import math
+
+import gurobipy as gp
+from gurobipy import GRB
+
+
+class LazyCallback:
+    """
+    惰性约束回调
+    模型中只保留客户访问与车辆流平衡约束, 负载与时间窗的大M约束改为在求解过程中按需分离:
+    1. 整数解(MIPSOL): 子回路消除/取整容量割, 容量超限路线的取整容量割, 时间窗不可行路径割
+    2. 分数解(MIPNODE, 可选): 在支撑图的连通分量上分离子回路消除/取整容量割
+    所有割都对车辆求和, 即作用在聚合弧流量 sum_k x_ijk 上
+    """
+    def __init__(self, instance, x, num_vehicles, fractional=False):
+        """
+        :param instance: 算例数据
+        :param x: 决策变量 x[i, j, k]
+        :param num_vehicles: 车辆数量
+        :param fractional: 是否在分数解上分离割
+        """
+        self.instance = instance  # 算例数据
+        self.x = x  # 决策变量
+        self.num_vehicles = num_vehicles  # 车辆数量
+        self.fractional = fractional
+        self.keys = list(x.keys())
+        self.vars = list(x.values())
+        self.cuts = 0  # 已添加的割数(惰性割与分数解上的割)
+        self.rejected = False  # 本次MIPSOL调用是否添加了惰性割, 即当前整数解是否被拒绝
+
+    def __call__(self, model, where):
+        if where == GRB.Callback.MIPSOL:
+            self.rejected = False
+            values = model.cbGetSolution(self.vars)
+            for expr, rhs in self.separate_integer(values):
+                model.cbLazy(expr >= rhs)
+                self.cuts += 1
+                self.rejected = True
+        elif self.fractional and where == GRB.Callback.MIPNODE:
+            if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+                return
+            values = model.cbGetNodeRel(self.vars)
+            for expr, rhs in self.separate_fractional(values):
+                model.cbCut(expr >= rhs)
+                self.cuts += 1
+
+    def capacity_rhs(self, customers):
+        """
+        取整容量割右端: ceil(d(S) / Q), 至少为1
+        """
+        demand = sum(self.instance.demand[j] for j in customers)
+        return max(1, math.ceil(demand / self.instance.capacity - 1e-9))
+
+    def capacity_cut(self, customers):
+        """
+        取整容量割: 进入客户集合S的弧流量 >= ceil(d(S) / Q), 右端为1时即子回路消除约束
+        """
+        S = set(customers)
+        rhs = self.capacity_rhs(S)
+        expr = gp.quicksum(self.x[i, j, k]
+                           for j in S
+                           for i in self.instance.predecessors[j] if i not in S
+                           for k in range(self.num_vehicles))
+        return expr, rhs
+
+    def path_cut(self, path):
+        """
+        时间窗不可行路径割: 路径上的弧不能全部被使用, 即 -sum x <= -(|P| - 1)
+        """
+        arcs = list(zip(path[:-1], path[1:]))
+        expr = gp.quicksum(-self.x[i, j, k] for i, j in arcs for k in range(self.num_vehicles))
+        return expr, -(len(arcs) - 1)
+
+    def separate_integer(self, values):
+        """
+        在整数解上分离割
+        :param values: 与self.vars对应的变量取值
+        :return: [(表达式, 右端), ...], 约束形式为 表达式 >= 右端
+        """
+        successor = {}
+        for (i, j, k), value in zip(self.keys, values):
+            if value > 0.5:
+                successor[i, k] = j
+
+        cuts = []
+        visited = set()
+        for k in range(self.num_vehicles):
+            if (0, k) not in successor:
+                continue
+            route = [0]
+            node = successor[0, k]
+            while node != 0:
+                route.append(node)
+                visited.add(node)
+                node = successor[node, k]
+            route.append(0)
+
+            # 容量超限
+            customers = route[1:-1]
+            if sum(self.instance.demand[j] for j in customers) > self.instance.capacity:
+                cuts.append(self.capacity_cut(customers))
+            # 时间窗不可行
+            path = self.infeasible_path(route)
+            if path is not None:
+                cuts.append(self.path_cut(path))
+
+        # 不经过depot的子回路
+        for (i, k), j in successor.items():
+            if i == 0 or i in visited:
+                continue
+            cycle = [i]
+            visited.add(i)
+            node = j
+            while node != i:
+                cycle.append(node)
+                visited.add(node)
+                node = successor[node, k]
+            cuts.append(self.capacity_cut(cycle))
+        return cuts
+
+    def infeasible_path(self, route):
+        """
+        找出路线中最短的时间窗不可行子路径
+        :return: 节点序列, 路线可行时返回None
+        """
+        instance = self.instance
+        start, _ = instance.route_schedule(route)
+        # 返回depot的时间不受约束
+        late = [p for p in range(1, len(route) - 1) if start[p] > instance.due_date[route[p]] + 1e-6]
+        if not late:
+            return None
+        end = late[0]
+        # 从end向前寻找最短的仍不可行的子路径, 子路径起点按最早时间开始服务
+        for first in range(end - 1, -1, -1):
+            sub_start, _ = instance.route_schedule(route[first:end + 1])
+            if sub_start[-1] > instance.due_date[route[end]] + 1e-6:
+                return route[first:end + 1]
+        return route[:end + 1]
+
+    def separate_fractional(self, values):
+        """
+        在分数解上分离割: 对聚合弧流量的支撑图(去掉depot)求连通分量, 检查取整容量割
+        """
+        flow = {}
+        for (i, j, k), value in zip(self.keys, values):
+            if value > 1e-6:
+                flow[i, j] = flow.get((i, j), 0.0) + value
+
+        # 支撑图的连通分量(无向, 不含depot)
+        parent = list(range(self.instance.n))
+
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        for (i, j), value in flow.items():
+            if i != 0 and j != 0 and value > 1e-6:
+                parent[find(i)] = find(j)
+
+        components = {}
+        for j in range(1, self.instance.n):
+            components.setdefault(find(j), []).append(j)
+
+        cuts = []
+        for customers in components.values():
+            S = set(customers)
+            inflow = sum(value for (i, j), value in flow.items() if j in S and i not in S)
+            if inflow < self.capacity_rhs(S) - 1e-4:
+                cuts.append(self.capacity_cut(customers))
+        return cuts
@@ -0,0 +1,132 @@
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+
+
+class MatrixConstraint:
+    """
+    矩阵形式的约束类
+    用NumPy/SciPy将每一族约束组装成稀疏系数矩阵, 通过addMConstr一次性交给求解器,
+    与Constraint中逐行addConstr的约束完全相同
+
+    变量按列排列为 [x | load | arrival_time]:
+    x[a, k]在第 a*K + k 列(a为instance.arcs中弧的序号),
+    load[i, k]与arrival_time[i, k]分别在各自块的第 i*K + k 列
+    """
+    def __init__(self, instance, num_vehicles):
+        self.instance = instance  # 算例数据
+        self.num_vehicles = num_vehicles  # 车辆数量
+        self.n = instance.n  # 客户数量
+
+        arcs = np.array(instance.arcs, dtype=np.int64).reshape(-1, 2)
+        self.arc_i = arcs[:, 0]  # 弧起点
+        self.arc_j = arcs[:, 1]  # 弧终点
+        self.num_x = len(arcs) * num_vehicles  # x变量个数
+        self.num_node = self.n * num_vehicles  # load/arrival_time变量个数
+        self.num_cols = self.num_x + 2 * self.num_node  # 总列数
+
+    def x_index(self, arc_index, k):
+        """
+        x[a, k]在变量向量中的列号
+        """
+        return arc_index * self.num_vehicles + k
+
+    def load_index(self, i, k):
+        """
+        load[i, k]在变量向量中的列号
+        """
+        return self.num_x + i * self.num_vehicles + k
+
+    def arrival_index(self, i, k):
+        """
+        arrival_time[i, k]在变量向量中的列号
+        """
+        return self.num_x + self.num_node + i * self.num_vehicles + k
+
+    def matrix(self, rows, cols, vals, num_rows):
+        """
+        由三元组组装CSR稀疏矩阵
+        """
+        return sp.csr_matrix((vals, (rows, cols)), shape=(num_rows, self.num_cols))
+
+    def add_constraints(self, model, variables):
+        """
+        添加约束
+        :param model: gurobi模型
+        :param variables: 按[x | load | arrival_time]顺序排列的变量列表
+        :return:
+        """
+        K = self.num_vehicles
+        n = self.n
+        ks = np.arange(K)
+        num_arcs = len(self.arc_i)
+        arc_ids = np.arange(num_arcs)
+
+        # 每个(弧, 车辆)组合展开, 与x的列顺序一致
+        a_rep = np.repeat(arc_ids, K)
+        k_rep = np.tile(ks, num_arcs)
+        i_rep = self.arc_i[a_rep]
+        j_rep = self.arc_j[a_rep]
+        x_cols = self.x_index(a_rep, k_rep)
+
+        # 1. 客户访问约束：每个客户必须且只能被访问一次
+        into_customer = j_rep != 0
+        A = self.matrix(j_rep[into_customer] - 1, x_cols[into_customer],
+                        np.ones(into_customer.sum()), n - 1)
+        model.addMConstr(A, variables, GRB.EQUAL, np.ones(n - 1), name="visit_customer")
+
+        # 2. 车辆流平衡约束
+        # 2.1 每辆车必须从depot出发
+        from_depot = (i_rep == 0) & (j_rep != 0)
+        A = self.matrix(k_rep[from_depot], x_cols[from_depot], np.ones(from_depot.sum()), K)
+        model.addMConstr(A, variables, GRB.LESS_EQUAL, np.ones(K), name="depot_out")
+
+        # 2.2 流入流出平衡：对于每个节点，进入的车辆数等于离开的车辆数
+        rows = np.concatenate([j_rep * K + k_rep, i_rep * K + k_rep])
+        cols = np.concatenate([x_cols, x_cols])
+        vals = np.concatenate([np.ones(len(x_cols)), -np.ones(len(x_cols))])
+        A = self.matrix(rows, cols, vals, n * K)
+        model.addMConstr(A, variables, GRB.EQUAL, np.zeros(n * K), name="flow_balance")
+
+        # 3. 容量约束
+        # 3.1 depot负载为0与容量上限已作为load变量的上下界(instance.load_lb/load_ub)
+
+        # 3.2 负载传播: load_j - load_i - M_ij * x_ijk >= d_j - M_ij, M_ij <= 0 的行被上下界蕴含
+        demand = self.instance.demand
+        M = self.instance.load_big_m[i_rep, j_rep]
+        prop = into_customer & (M > 0)  # 跳过返回depot的弧
+        self.add_propagation(model, variables, i_rep[prop], j_rep[prop], k_rep[prop], x_cols[prop],
+                             self.load_index, M[prop], demand[j_rep[prop]], name="load_prop")
+
+        # 4. 时间窗约束
+        # 4.1 时间窗[ready_i, due_i]已作为arrival_time变量的上下界
+
+        # 4.2 设置到达时间约束: a_j - a_i - M_ij * x_ijk >= s_i + t_ij - M_ij
+        travel_time = self.instance.travel_time
+        service_time = self.instance.service_time
+        M = self.instance.time_big_m[i_rep, j_rep]
+        prop = into_customer & (M > 0)
+        self.add_propagation(model, variables, i_rep[prop], j_rep[prop], k_rep[prop], x_cols[prop],
+                             self.arrival_index, M[prop],
+                             service_time[i_rep[prop]] + travel_time[i_rep[prop], j_rep[prop]],
+                             name="time_window_prop")
+
+    def add_propagation(self, model, variables, i, j, k, x_cols, node_index, big_m, delta, name):
+        """
+        添加传播约束族: v_j - v_i - M_ij * x_ijk >= delta_ij - M_ij
+        :param i: 每行的弧起点
+        :param j: 每行的弧终点
+        :param k: 每行的车辆
+        :param x_cols: 每行对应x变量的列号
+        :param node_index: 节点变量(load或arrival_time)的列号函数
+        :param big_m: 每行的大M
+        :param delta: 每行的增量(需求或服务时间加行驶时间)
+        :param name: 约束名
+        """
+        num_rows = len(i)
+        row_ids = np.arange(num_rows)
+        rows = np.concatenate([row_ids, row_ids, row_ids])
+        cols = np.concatenate([node_index(j, k), node_index(i, k), x_cols])
+        vals = np.concatenate([np.ones(num_rows), -np.ones(num_rows), -big_m])
+        A = self.matrix(rows, cols, vals, num_rows)
+        model.addMConstr(A, variables, GRB.GREATER_EQUAL, delta - big_m, name=name)
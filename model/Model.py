@@ -1,64 +1,398 @@
+import queue
+import threading
+
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
-import math
 from model.Constraint import Constraint
+from model.FleetSizing import FleetSizing
+from model.MatrixConstraint import MatrixConstraint
+from model.LazyCallback import LazyCallback
+from model.IncumbentCallback import IncumbentCallback
+from model.Incremental import Incremental
 from model.Objective import Objective
+from model.BaseModel import BaseModel
+from model.Profiler import Profiler, ProgressCallback
+from heuristic.Insertion import SolomonInsertion
 
-class Model:
+class Model(BaseModel):
     """
     CVRPTW模型类
     """
-    def __init__(self, vehicle_data, customer_data):
-        self.vehicle_data = vehicle_data  # 车辆数据
-        self.customer_data = customer_data  # 客户数据
-        self.n = len(customer_data)  # 客户数量
-        self.num_vehicles = vehicle_data['number']  # 车辆数量
-        self.model = gp.Model("VRP") # 创建模型
-        self.x = None  # 决策变量
-        self.load = None  # 负载变量
-
-    def build_model(self):
-        # 创建决策变量
-        self.x = self.model.addVars(self.n, self.n, self.num_vehicles, vtype=GRB.BINARY, name="x")
-        self.load = self.model.addVars(self.n, self.num_vehicles, vtype=GRB.CONTINUOUS, name="load")
+    SYMMETRY = ('usage', 'lowest_index', 'orbital')  # 可选的对称性处理方式
+
+    def __init__(self, vehicle_data, customer_data, instance=None, env=None, num_vehicles=None):
+        """
+        :param vehicle_data: 车辆数据
+        :param customer_data: 客户数据
+        :param instance: 已构建的算例, 给定时直接共享, 不再重新构建
+        :param env: Gurobi环境, 默认使用全局环境; 多线程同时求解时每个线程应使用独立的环境
+        :param num_vehicles: 车辆数量, 默认为vehicle_data['number'], 可以收缩为已知的车队规模
+        """
+        super().__init__(vehicle_data, customer_data, instance, env, num_vehicles)
+        self.constraint = None  # 逐行构建时的约束对象, 增量修改时使用
+        self.incremental = None  # 增量修改状态, 首次修改时创建
+        self.previous_routes = None  # 修改前的路线, 用于重新求解时的初始解
+        self.sizing = None  # 车辆数的上下界, 由sized()创建时设置
+        self.symmetry = None  # 使用的对称性处理方式
+
+    @classmethod
+    def sized(cls, instance, env=None):
+        """
+        由算例创建模型, 车辆数收缩为插入启发式的路线数(FleetSizing), 而不是算例给定的车辆数;
+        build_model默认添加车辆使用顺序约束, warm_start默认使用同一组启发式路线
+        以总距离为目标时这是启发式的限制, 求得的最优只是限制车队上的最优; build_model(fleet=True)时限制不影响最优性
+        """
+        sizing = FleetSizing(instance)
+        model = cls.from_instance(instance, env, sizing.num_vehicles)
+        model.sizing = sizing
+        return model
+
+    def build_model(self, matrix=False, lazy=False, fractional_cuts=False, fleet=False, symmetry=None):
+        """
+        构建模型
+        :param matrix: 是否使用矩阵接口(addMVar/addMConstr)批量构建, 默认逐行构建
+        :param lazy: 是否使用惰性约束模式, 只添加访问与流平衡约束, 容量与时间窗由回调按需添加
+        :param fractional_cuts: 惰性约束模式下是否在分数解上分离割
+        :param fleet: 是否使用词典序目标, 先最小化车辆数再最小化距离
+        :param symmetry: 车辆对称性的处理方式, 见add_symmetry_constraints; True等同于'usage',
+                         默认只在sized()创建的模型上使用'usage'
+        :return:
+        """
+        if symmetry is None:
+            symmetry = self.sizing is not None
+        if symmetry is True:
+            symmetry = 'usage'
+        with self.profiler.phase('build'):
+            if lazy:
+                self.build_model_lazy(fractional_cuts)
+            elif matrix:
+                self.build_model_matrix()
+            else:
+                self.build_model_rows()
+            if symmetry:
+                self.add_symmetry_constraints(symmetry)
+            if fleet:
+                self.set_fleet_objective()
+        if self.profiler.enabled:
+            self.profiler.statistics(self.model)
+
+    def profile(self, profiler=None, log=False):
+        """
+        启用计时与求解进度事件, 需在build_model之前调用才能记录建模各阶段
+        :param profiler: 使用的Profiler, 默认新建
+        :param log: 是否把Gurobi日志行也转为事件
+        :return: Profiler, 可以用subscribe订阅事件
+        """
+        self.profiler = profiler or Profiler()
+        self.callbacks.append(ProgressCallback(self.profiler, log, self.lazy_callback()))
+        return self.profiler
+
+    def set_fleet_objective(self):
+        """
+        设置Solomon的层次目标: 第一目标为车辆数(优先级高), 第二目标为总距离
+        :return:
+        """
+        objective = Objective(self.instance, self.x, self.num_vehicles)
+        self.model.ModelSense = GRB.MINIMIZE
+        self.model.setObjectiveN(objective.fleet(), index=0, priority=1, name="fleet")
+        self.model.setObjectiveN(objective.build(), index=1, priority=0, name="distance")
+
+    def add_symmetry_constraints(self, mode='usage'):
+        """
+        处理相同车辆的对称性, 否则求解器要搜索每个解的K!种车辆排列
+        :param mode: 'usage': 车辆使用顺序约束, 前(容量下界)辆车必须使用;
+                     'lowest_index': 在usage的基础上, 车辆按所服务客户的最小编号排序, 每个解只保留一种排列;
+                     'orbital': 不添加约束, 把Gurobi的Symmetry参数设为2, 由求解器检测对称性并做轨道固定
+        """
+        if mode not in self.SYMMETRY:
+            raise ValueError(f"未知的对称性处理方式: {mode}, 可选 {self.SYMMETRY}")
+        self.symmetry = mode
+        if mode == 'orbital':
+            self.model.setParam('Symmetry', 2)
+            return
+        constraint = self.constraint or Constraint(self.instance, self.x, self.load, self.num_vehicles)
+        with self.profiler.phase('symmetry_constraints', self.model):
+            constraint.add_symmetry_constraints(self.model, FleetSizing.demand_bound(self.instance))
+            if mode == 'lowest_index':
+                constraint.add_assignment_order_constraints(self.model)
+
+    def build_model_rows(self):
+        """
+        逐行构建模型
+        :return:
+        """
+        profiler = self.profiler
+
+        # 创建决策变量, 只在可行弧上创建
+        with profiler.phase('variables', self.model):
+            keys = [(i, j, k) for i, j in self.instance.arcs for k in range(self.num_vehicles)]
+            self.x = self.model.addVars(keys, vtype=GRB.BINARY, name="x")
+            node_keys = [(i, k) for i in range(self.n) for k in range(self.num_vehicles)]
+            self.load = self.model.addVars(node_keys,
+                                           lb={(i, k): self.instance.load_lb[i] for i, k in node_keys},
+                                           ub={(i, k): self.instance.load_ub[i] for i, k in node_keys},
+                                           vtype=GRB.CONTINUOUS, name="load")
 
         # 添加目标函数
-        objective = Objective(self.customer_data, self.x, self.num_vehicles)
-        self.model.setObjective(objective.build(), GRB.MINIMIZE)
+        with profiler.phase('objective', self.model):
+            objective = Objective(self.instance, self.x, self.num_vehicles)
+            self.model.setObjective(objective.build(), GRB.MINIMIZE)
 
         # 添加约束
-        constraint = Constraint(self.customer_data, self.x, self.load, self.vehicle_data, self.num_vehicles)
+        constraint = Constraint(self.instance, self.x, self.load, self.num_vehicles, profiler)
         constraint.add_constraints(self.model)
+        self.arrival_time = constraint.arrival_time
+        self.constraint = constraint
+
+    def build_model_lazy(self, fractional_cuts=False):
+        """
+        构建惰性约束模式的模型: 不创建负载与时间变量, 由LazyCallback在求解中添加割
+        :param fractional_cuts: 是否在分数解上分离割
+        :return:
+        """
+        profiler = self.profiler
+        with profiler.phase('variables', self.model):
+            keys = [(i, j, k) for i, j in self.instance.arcs for k in range(self.num_vehicles)]
+            self.x = self.model.addVars(keys, vtype=GRB.BINARY, name="x")
+
+        # 添加目标函数
+        with profiler.phase('objective', self.model):
+            objective = Objective(self.instance, self.x, self.num_vehicles)
+            self.model.setObjective(objective.build(), GRB.MINIMIZE)
+
+        # 只添加访问与流平衡约束
+        constraint = Constraint(self.instance, self.x, None, self.num_vehicles, profiler)
+        with profiler.phase('routing_constraints', self.model):
+            constraint.add_routing_constraints(self.model)
+
+        # 安装回调
+        self.model.setParam('LazyConstraints', 1)
+        if fractional_cuts:
+            self.model.setParam('PreCrush', 1)
+        # 惰性约束回调最先执行, 其他回调由它的rejected判断整数解是否被拒绝
+        lazy = LazyCallback(self.instance, self.x, self.num_vehicles, fractional_cuts)
+        self.callbacks.insert(0, lazy)
+        for callback in self.callbacks:
+            if isinstance(callback, ProgressCallback):
+                callback.lazy = lazy
+
+    def lazy_callback(self):
+        """
+        已安装的LazyCallback, 非惰性约束模式返回None
+        """
+        return next((c for c in self.callbacks if isinstance(c, LazyCallback)), None)
+
+    def build_model_matrix(self):
+        """
+        使用矩阵接口构建模型: 目标函数与各约束族以稀疏矩阵形式一次性添加
+        :return:
+        """
+        K = self.num_vehicles
+        keys = [(i, j, k) for i, j in self.instance.arcs for k in range(K)]
+        node_keys = [(i, k) for i in range(self.n) for k in range(K)]
+
+        # 创建决策变量
+        with self.profiler.phase('variables', self.model):
+            x = self.model.addMVar(len(keys), vtype=GRB.BINARY, name="x")
+            instance = self.instance
+            load = self.model.addMVar(len(node_keys), lb=np.repeat(instance.load_lb, K),
+                                      ub=np.repeat(instance.load_ub, K), vtype=GRB.CONTINUOUS, name="load")
+            arrival_time = self.model.addMVar(len(node_keys), lb=np.repeat(instance.ready_time, K),
+                                              ub=np.repeat(instance.due_date, K),
+                                              vtype=GRB.CONTINUOUS, name="arrival_time")
+
+            # 保留与逐行构建相同的下标访问方式
+            x_list, load_list, arrival_list = x.tolist(), load.tolist(), arrival_time.tolist()
+            self.x = gp.tupledict(zip(keys, x_list))
+            self.load = gp.tupledict(zip(node_keys, load_list))
+            self.arrival_time = gp.tupledict(zip(node_keys, arrival_list))
+
+        # 添加目标函数
+        with self.profiler.phase('objective', self.model):
+            objective = Objective(self.instance, self.x, K)
+            self.model.setObjective(objective.coefficients() @ x, GRB.MINIMIZE)
+
+        # 添加约束
+        with self.profiler.phase('constraints', self.model):
+            constraint = MatrixConstraint(self.instance, K)
+            constraint.add_constraints(self.model, x_list + load_list + arrival_list)
+
+    def warm_start(self, routes=None):
+        """
+        用构造启发式的路线设置MIP初始解(x, load, arrival_time的Start属性), 需在build_model之后调用
+        :param routes: 路线列表, 每条路线为以depot开始和结束的节点序列, 默认由SolomonInsertion构造
+        :return: 使用的路线
+        """
+        if routes is None and self.sizing is not None:
+            routes = self.sizing.routes
+        if routes is None:
+            routes = SolomonInsertion(self.instance).solve()
+        if self.symmetry == 'lowest_index':
+            # 初始解的车辆顺序需满足最小编号排序
+            routes = sorted(routes, key=lambda route: min(route[1:-1], default=self.n))
+        if len(routes) > self.num_vehicles:
+            print(f"Warm start uses {len(routes)} routes, only the first {self.num_vehicles} are loaded")
+
+        x_start = dict.fromkeys(self.x.keys(), 0.0)
+        load_start, arrival_start = {}, {}
+        for k, route in enumerate(routes[:self.num_vehicles]):
+            arrival, load = self.instance.route_schedule(route)
+            for i, j in zip(route[:-1], route[1:]):
+                if (i, j, k) in x_start:  # 跳过不可行弧
+                    x_start[i, j, k] = 1.0
+            # 路线末尾返回depot不对应单独的变量
+            for node, a, q in zip(route[:-1], arrival[:-1], load[:-1]):
+                arrival_start[node, k] = a
+                load_start[node, k] = q
+
+        self.model.setAttr('Start', list(self.x.values()), list(x_start.values()))
+        # 惰性约束模式下没有负载与时间变量
+        if self.load is not None:
+            self.model.setAttr('Start', [self.load[key] for key in load_start], list(load_start.values()))
+        if self.arrival_time is not None:
+            self.model.setAttr('Start', [self.arrival_time[key] for key in arrival_start],
+                               list(arrival_start.values()))
+        return routes
 
-    def optimize(self, time_limit = None):
+    def optimize_stream(self, time_limit=None, threads=None):
         """
-        优化模型并返回解决方案
+        流式求解: 每找到一个更优的incumbent就产出一次, 不必等到求解结束
+        求解在后台线程中进行, 调用方提前停止迭代(break或关闭生成器)时终止求解
         :param time_limit: 优化时间限制, 单位为秒, 默认为None(不设置时间限制)
-        :return: 当前最优解
+        :param threads: 求解线程数, 默认为None(由Gurobi决定)
+        :return: 生成器, 每项为{'routes': {车辆编号: [0, ..., 0]}, 'objective', 'bound', 'runtime'}
         """
-        # 设置时间限制
         if time_limit is not None:
             self.model.setParam('TimeLimit', time_limit)
+        if threads is not None:
+            self.model.setParam('Threads', threads)
+
+        incumbents = queue.Queue()
+        callback = IncumbentCallback(self.x_vars(), self.decode_routes, incumbents.put, self.lazy_callback())
+        self.callbacks.append(callback)
+        done = object()  # 求解结束标记
+        errors = []
+
+        def run():
+            try:
+                self.model.optimize(self.callback)
+            except gp.GurobiError as error:
+                errors.append(error)
+            finally:
+                incumbents.put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                incumbent = incumbents.get()
+                if incumbent is done:
+                    break
+                yield incumbent
+        finally:
+            # 调用方提前停止时终止求解, 正常结束时terminate不起作用
+            self.model.terminate()
+            thread.join()
+            self.callbacks.remove(callback)
+        if errors:
+            raise errors[0]
+
+    def modify(self):
+        """
+        增量修改前的准备: 创建增量状态, 并在模型被修改(解失效)前保存当前路线
+        """
+        if self.incremental is None:
+            self.incremental = Incremental(self)
+        if self.previous_routes is None and self.model.SolCount > 0:
+            self.previous_routes = list(self.decode_routes(self.solution_values()).values())
+        return self.incremental
+
+    def add_customer(self, x, y, demand, ready_time, due_date, service_time, customer_id=None):
+        """
+        新增客户, 只添加与新客户相关的变量和约束
+        :param ready_time: 最早开始服务时间
+        :param due_date: 最晚开始服务时间, 与算例文件中的DUE DATE一致
+        :param customer_id: 客户编号, 默认为当前最大编号加1
+        :return: 新客户的节点下标
+        """
+        incremental = self.modify()
+        columns = self.instance.columns()
+        if customer_id is None:
+            customer_id = int(columns['id'].max()) + 1
+        row = {'id': customer_id, 'x': x, 'y': y, 'demand': demand, 'ready_time': ready_time,
+               'due_date': due_date + service_time, 'service_time': service_time}
+        for name, value in row.items():
+            columns[name] = np.append(columns[name], value)
+        incremental.apply(columns)
+        return self.n - 1
+
+    def remove_customer(self, node):
+        """
+        删除客户: 屏蔽其所有弧, 访问约束右端改为0, 节点下标保持不变
+        :param node: 客户的节点下标
+        """
+        if not 0 < node < self.n:
+            raise ValueError(f"节点 {node} 不是客户。")
+        incremental = self.modify()
+        incremental.removed.add(node)
+        incremental.apply(self.instance.columns())
+
+    def update_time_window(self, node, ready_time, due_date):
+        """
+        修改客户的时间窗
+        :param ready_time: 最早开始服务时间
+        :param due_date: 最晚开始服务时间, 与算例文件中的DUE DATE一致
+        """
+        incremental = self.modify()
+        columns = self.instance.columns()
+        columns['ready_time'][node] = ready_time
+        columns['due_date'][node] = due_date + columns['service_time'][node]
+        incremental.apply(columns)
 
-        # 开始
-        self.model.optimize()
+    def update_demand(self, node, demand):
+        """
+        修改客户的需求
+        """
+        incremental = self.modify()
+        columns = self.instance.columns()
+        columns['demand'][node] = demand
+        incremental.apply(columns)
 
-        # 检查状态
-        if self.model.status == GRB.OPTIMAL:
-            return self.extract_solution()
-        elif self.model.status == GRB.TIME_LIMIT:
-            # 如果达到时间限制但找到了可行解，也返回当前最佳解
-            if self.model.SolCount > 0:
-                return self.extract_solution()
-        return None
+    def reoptimize(self, time_limit=None, threads=None):
+        """
+        增量修改后重新求解, 以修改前的路线(去掉已删除的客户, 不可行的路线拆开)作为初始解
+        :return: 当前最优解, 与optimize相同
+        """
+        if self.incremental is not None and self.previous_routes is not None:
+            self.warm_start(self.incremental.routes(self.previous_routes))
+        self.previous_routes = None
+        return self.optimize(time_limit, threads)
+
+    def decode_routes(self, values):
+        """
+        由x的取值向量还原各车辆的节点序列, 只对取值为1的弧做Python循环
+        :param values: 取值向量, 顺序与self.x.keys()一致, 可以来自getAttr或回调中的cbGetSolution
+        :return: {车辆编号: [0, ..., 0]}, 只包含被使用的车辆
+        """
+        self.x_vars()
+        chosen = self._x_keys[np.asarray(values) > 0.5]
+        chosen = chosen[np.argsort(chosen[:, 2], kind='stable')]
+        vehicles, starts = np.unique(chosen[:, 2], return_index=True)
 
-    def extract_solution(self):
         routes = {}
-        for k in range(self.num_vehicles):
-            route = []
-            for i in range(self.n):
-                for j in range(self.n):
-                    if self.x[i, j, k].x > 0.5:
-                        route.append((i, j))
-            routes[k] = route
+        for k, arcs in zip(vehicles.tolist(), np.split(chosen[:, :2], starts[1:])):
+            successor = dict(arcs.tolist())
+            if 0 not in successor:
+                continue
+            nodes = [0]
+            # 步数上限防止在不完整的解(如回调中的分数解)上死循环
+            while len(nodes) <= self.n:
+                nxt = successor.get(nodes[-1])
+                if nxt is None:
+                    break
+                nodes.append(nxt)
+                if nxt == 0:
+                    break
+            routes[k] = nodes
         return routes
@@ -1,11 +1,13 @@
 import math
+import numpy as np
+import gurobipy as gp
 
 class Objective:
     """
     目标函数类
     """
-    def __init__(self, customer_data, x, num_vehicles):
-        self.customer_data = customer_data # 客户数据
+    def __init__(self, instance, x, num_vehicles):
+        self.instance = instance # 算例数据
         self.x = x # 决策变量
         self.num_vehicles = num_vehicles # 车辆数量
 
@@ -24,9 +26,25 @@ class Objective:
         目标函数：最小化总距离
         :return:
         """
-        obj = 0
-        for i in range(len(self.customer_data)):
-            for j in range(len(self.customer_data)):
-                for k in range(self.num_vehicles):
-                    obj += self.distance(self.customer_data[i], self.customer_data[j]) * self.x[i, j, k]
-        return obj
+        dist = self.instance.distance
+        return gp.quicksum(dist[i, j] * self.x[i, j, k]
+                           for i, j in self.instance.arcs
+                           for k in range(self.num_vehicles))
+
+    def fleet(self):
+        """
+        使用的车辆数: 离开depot的弧之和
+        :return:
+        """
+        return gp.quicksum(self.x[0, j, k]
+                           for j in self.instance.successors[0]
+                           for k in range(self.num_vehicles))
+
+    def coefficients(self):
+        """
+        目标函数系数向量, 顺序与instance.arcs展开到各车辆后的x变量一致
+        :return:
+        """
+        arcs = np.array(self.instance.arcs, dtype=np.int64).reshape(-1, 2)
+        cost = self.instance.distance[arcs[:, 0], arcs[:, 1]]
+        return np.repeat(cost, self.num_vehicles)
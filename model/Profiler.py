@@ -0,0 +1,149 @@
+import math
+import time
+from contextlib import contextmanager
+
+from gurobipy import GRB
+
+try:
+    import resource
+except ImportError:  # Windows下没有resource模块, 不记录峰值内存
+    resource = None
+
+
+def peak_rss():
+    """
+    当前进程的峰值常驻内存, 单位为MB, 不支持的平台返回None
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux下ru_maxrss单位为KB
+
+
+class Profiler:
+    """
+    建模与求解的计时和事件记录
+    各阶段的耗时, 新增的行数/非零元与峰值内存以及求解进度都以字典事件的形式记录, 并推送给订阅者;
+    未启用时phase不做任何事, 不影响正常建模的速度
+    事件类型:
+    phase: {'name', 'seconds', 'rows', 'nonzeros', 'peak_rss_mb'}, 给定模型时才有行数与非零元
+    statistics: {'rows', 'columns', 'nonzeros', 'binaries'}
+    incumbent / progress: {'objective', 'bound', 'gap', 'nodes', 'runtime'}
+    log: {'message'}
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.timings = {}  # 阶段名 -> 累计耗时
+        self.events = []  # 已记录的事件
+        self.subscribers = []  # 事件订阅者, 每个为callable(event)
+
+    def subscribe(self, subscriber):
+        """
+        订阅事件, 如print或写入JSON行文件的函数
+        """
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def emit(self, event):
+        """
+        记录事件并推送给订阅者, time为相对于创建Profiler的秒数
+        """
+        if not self.enabled:
+            return
+        event.setdefault('time', time.perf_counter() - self.start)
+        self.events.append(event)
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+    @contextmanager
+    def phase(self, name, model=None):
+        """
+        对一个阶段计时
+        :param name: 阶段名, 如'variables', 'load_constraints'
+        :param model: Gurobi模型, 给定时统计该阶段新增的行数与非零元(需要调用model.update())
+        """
+        if not self.enabled:
+            yield
+            return
+        if model is not None:
+            model.update()
+            rows, nonzeros = model.NumConstrs, model.NumNZs
+        start = time.perf_counter()
+        yield
+        if model is not None:
+            model.update()  # 计入Gurobi处理待添加约束的时间
+        seconds = time.perf_counter() - start
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+        event = {'type': 'phase', 'name': name, 'seconds': seconds, 'peak_rss_mb': peak_rss()}
+        if model is not None:
+            event['rows'] = model.NumConstrs - rows
+            event['nonzeros'] = model.NumNZs - nonzeros
+        self.emit(event)
+
+    def statistics(self, model):
+        """
+        记录模型规模
+        :return: {'rows', 'columns', 'nonzeros', 'binaries'}
+        """
+        model.update()
+        statistics = {'rows': model.NumConstrs, 'columns': model.NumVars,
+                      'nonzeros': model.NumNZs, 'binaries': model.NumBinVars}
+        self.emit(dict(statistics, type='statistics'))
+        return statistics
+
+    def phases(self):
+        """
+        各阶段的事件, 按记录顺序排列
+        """
+        return [event for event in self.events if event['type'] == 'phase']
+
+
+class ProgressCallback:
+    """
+    求解进度回调, 把Gurobi的进度与日志转为Profiler事件
+    MIPSOL: 新的incumbent; MIP: incumbent或界变化时的进度; MESSAGE: 日志行(可选)
+    与LazyCallback同时使用时, 被惰性约束拒绝的整数解不作为incumbent上报
+    """
+    def __init__(self, profiler, log=False, lazy=None):
+        """
+        :param profiler: 接收事件的Profiler
+        :param log: 是否把Gurobi日志行也转为事件
+        :param lazy: 同一模型上的LazyCallback, 需先于本回调执行, 用于识别被拒绝的解
+        """
+        self.profiler = profiler
+        self.log = log
+        self.lazy = lazy
+        self.last = None  # 上次报告的(incumbent, bound)
+
+    @staticmethod
+    def gap(objective, bound):
+        if objective is None or math.isinf(objective) or abs(objective) >= GRB.INFINITY:
+            return None
+        return abs(objective - bound) / max(abs(objective), 1e-10)
+
+    def __call__(self, model, where):
+        if where == GRB.Callback.MIPSOL:
+            if self.lazy is not None and self.lazy.rejected:
+                return
+            objective = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+            bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+            self.profiler.emit({'type': 'incumbent', 'objective': objective, 'bound': bound,
+                                'gap': self.gap(objective, bound),
+                                'nodes': model.cbGet(GRB.Callback.MIPSOL_NODCNT),
+                                'runtime': model.cbGet(GRB.Callback.RUNTIME)})
+        elif where == GRB.Callback.MIP:
+            objective = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            if (objective, bound) == self.last:
+                return
+            self.last = (objective, bound)
+            self.profiler.emit({'type': 'progress',
+                                'objective': None if abs(objective) >= GRB.INFINITY else objective,
+                                'bound': bound, 'gap': self.gap(objective, bound),
+                                'nodes': model.cbGet(GRB.Callback.MIP_NODCNT),
+                                'runtime': model.cbGet(GRB.Callback.RUNTIME)})
+        elif self.log and where == GRB.Callback.MESSAGE:
+            message = model.cbGet(GRB.Callback.MSG_STRING).rstrip('\n')
+            if message:
+                self.profiler.emit({'type': 'log', 'message': message})
@@ -0,0 +1,52 @@
+
+class TwoIndexConstraint:
+    """
+    两下标模型约束类
+    车辆不再区分下标, 负载与时间变量定义在节点上
+    """
+    def __init__(self, instance, x, load, arrival_time, num_vehicles):
+        self.instance = instance  # 算例数据
+        self.x = x  # 决策变量 x[i, j]
+        self.load = load  # 节点负载
+        self.arrival_time = arrival_time  # 节点到达时间
+        self.num_vehicles = num_vehicles  # 车辆数量上限
+        self.n = instance.n  # 客户数量
+
+    def add_constraints(self, model):
+        """
+        添加约束
+        :param model:
+        :return:
+        """
+        # 1. 客户访问约束：每个客户恰好有一条入弧和一条出弧
+        for j in range(1, self.n):
+            model.addConstr(self.x.sum('*', j) == 1, f"visit_in_{j}")
+            model.addConstr(self.x.sum(j, '*') == 1, f"visit_out_{j}")
+
+        # 2. 车辆数约束：从depot出发的车辆数不超过车队规模, 且全部返回depot
+        model.addConstr(self.x.sum(0, '*') <= self.num_vehicles, "depot_out")
+        model.addConstr(self.x.sum(0, '*') == self.x.sum('*', 0), "depot_balance")
+
+        # 3. 容量约束：负载传播, 使用逐弧的大M
+        demand = self.instance.demand
+        load_big_m = self.instance.load_big_m
+        for (i, j) in self.x.keys():
+            M = load_big_m[i, j]
+            if j == 0 or M <= 0:
+                continue
+            model.addConstr(
+                self.load[j] >= self.load[i] + demand[j] - M * (1 - self.x[i, j]),
+                f"load_prop_{i}_{j}")
+
+        # 4. 时间窗约束：时间传播, 使用逐弧的大M
+        travel_time = self.instance.travel_time
+        service_time = self.instance.service_time
+        time_big_m = self.instance.time_big_m
+        for (i, j) in self.x.keys():
+            M = time_big_m[i, j]
+            if j == 0 or M <= 0:
+                continue
+            model.addConstr(
+                self.arrival_time[j] >=
+                self.arrival_time[i] + service_time[i] + travel_time[i, j] - M * (1 - self.x[i, j]),
+                f"time_window_prop_{i}_{j}")
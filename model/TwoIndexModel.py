@@ -0,0 +1,93 @@
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+from model.BaseModel import BaseModel
+from model.TwoIndexConstraint import TwoIndexConstraint
+from heuristic.Insertion import SolomonInsertion
+
+
+class TwoIndexModel(BaseModel):
+    """
+    车辆对称的两下标CVRPTW模型类
+    x[i, j]表示是否有车辆经过弧(i, j), 求解后再从弧中识别出各车辆路径
+    """
+    NAME = "VRP_two_index"
+    KEY_SIZE = 2
+
+    def build_model(self, fleet=False):
+        """
+        构建模型
+        :param fleet: 是否使用词典序目标, 先最小化车辆数再最小化距离
+        :return:
+        """
+        instance = self.instance
+        arcs = instance.arcs  # 预处理得到的可行弧
+
+        # 创建决策变量, 负载与时间窗直接作为变量上下界
+        self.x = self.model.addVars(arcs, vtype=GRB.BINARY, name="x")
+        self.load = self.model.addVars(self.n, lb=instance.load_lb.tolist(),
+                                       ub=instance.load_ub.tolist(), name="load")
+        self.arrival_time = self.model.addVars(self.n, lb=instance.ready_time.tolist(),
+                                               ub=instance.due_date.tolist(), name="arrival_time")
+
+        # 添加目标函数
+        dist = instance.distance
+        distance = gp.quicksum(dist[i, j] * self.x[i, j] for i, j in arcs)
+        if fleet:
+            self.model.ModelSense = GRB.MINIMIZE
+            self.model.setObjectiveN(self.x.sum(0, '*'), index=0, priority=1, name="fleet")
+            self.model.setObjectiveN(distance, index=1, priority=0, name="distance")
+        else:
+            self.model.setObjective(distance, GRB.MINIMIZE)
+
+        # 添加约束
+        constraint = TwoIndexConstraint(instance, self.x, self.load, self.arrival_time, self.num_vehicles)
+        constraint.add_constraints(self.model)
+
+    def warm_start(self, routes=None):
+        """
+        用构造启发式的路线设置MIP初始解(x, load, arrival_time的Start属性), 需在build_model之后调用
+        :param routes: 路线列表, 每条路线为以depot开始和结束的节点序列, 默认由SolomonInsertion构造
+        :return: 使用的路线
+        """
+        if routes is None:
+            routes = SolomonInsertion(self.instance).solve()
+
+        x_start = dict.fromkeys(self.x.keys(), 0.0)
+        load_start, arrival_start = {0: 0.0}, {0: self.instance.ready_time[0]}
+        for route in routes:
+            arrival, load = self.instance.route_schedule(route)
+            for i, j in zip(route[:-1], route[1:]):
+                if (i, j) in x_start:  # 跳过不可行弧
+                    x_start[i, j] = 1.0
+            for node, a, q in zip(route[1:-1], arrival[1:-1], load[1:-1]):
+                arrival_start[node] = a
+                load_start[node] = q
+
+        self.model.setAttr('Start', list(self.x.values()), list(x_start.values()))
+        self.model.setAttr('Start', [self.load[i] for i in load_start], list(load_start.values()))
+        self.model.setAttr('Start', [self.arrival_time[i] for i in arrival_start],
+                           list(arrival_start.values()))
+        return routes
+
+    def decode_routes(self, values):
+        """
+        由x的取值向量还原各车辆的节点序列, 车辆按离开depot的弧依次编号
+        :param values: 取值向量, 顺序与self.x.keys()一致
+        :return: {车辆编号: [0, ..., 0]}
+        """
+        self.x_vars()
+        chosen = self._x_keys[np.asarray(values) > 0.5].tolist()
+        successor = {i: j for i, j in chosen if i != 0}  # 客户只有一个后继
+        firsts = [j for i, j in chosen if i == 0]
+
+        routes = {}
+        for k, first in enumerate(firsts):
+            nodes = [0, first]
+            while nodes[-1] != 0 and len(nodes) <= self.n:
+                nxt = successor.get(nodes[-1])
+                if nxt is None:
+                    break
+                nodes.append(nxt)
+            routes[k] = nodes
+        return routes
@@ -0,0 +1,250 @@
+import hashlib
+from types import MappingProxyType
+
+import numpy as np
+
+from read.Parser import Parser
+
+
+class Instance:
+    """
+    算例数据类
+    在每个算例上只构建一次, 保存按节点排列的NumPy数组和距离矩阵,
+    供Model, Objective, Constraint与DrawMap共同读取
+    """
+    def __init__(self, vehicle_data, customer_data):
+        """
+        :param vehicle_data: 车辆数据, 包含'number'和'capacity'
+        :param customer_data: 客户数据列表, 第0个元素为depot
+        """
+        columns = {name: [c[name] for c in customer_data] for name in Parser.COLUMNS}
+        self.setup(vehicle_data, customer_data, columns)
+
+    @classmethod
+    def from_arrays(cls, vehicle_data, columns):
+        """
+        由列数组直接构建算例, 不经过客户字典
+        :param vehicle_data: 车辆数据, 包含'number'和'capacity'
+        :param columns: 列数组字典, 键为'id', 'x', 'y', 'demand', 'ready_time', 'due_date', 'service_time'
+        :return: Instance
+        """
+        instance = cls.__new__(cls)
+        instance.setup(vehicle_data, None, columns)
+        return instance
+
+    @property
+    def customer_data(self):
+        """
+        客户数据列表, 由列数组构建的算例在首次访问时才生成
+        """
+        if self._customer_data is None:
+            records = Parser.records({'id': self.ids, 'x': self.x, 'y': self.y,
+                                      'demand': self.demand, 'ready_time': self.ready_time,
+                                      'due_date': self.due_date, 'service_time': self.service_time})
+            self._customer_data = self.read_only_records(records) if self.frozen else records
+        return self._customer_data
+
+    def columns(self):
+        """
+        列数组的可写副本, 修改后可用于from_arrays构建新的算例
+        """
+        return {'id': self.ids.copy(), 'x': self.x.copy(), 'y': self.y.copy(),
+                'demand': self.demand.copy(), 'ready_time': self.ready_time.copy(),
+                'due_date': self.due_date.copy(), 'service_time': self.service_time.copy()}
+
+    def digest(self):
+        """
+        算例内容的哈希, 由车辆数据与各列数组计算, 与文件路径无关
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.array([self.num_vehicles, self.capacity], dtype=np.float64).tobytes())
+        for column in (self.ids, self.x, self.y, self.demand, self.ready_time, self.due_date, self.service_time):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        return digest.hexdigest()
+
+    def setup(self, vehicle_data, customer_data, columns):
+        """
+        由列数据计算数组, 距离矩阵, 可行弧与大M
+        """
+        self.vehicle_data = vehicle_data  # 车辆数据
+        self._customer_data = customer_data  # 客户数据
+        self.n = len(columns['id'])  # 节点数量(含depot)
+        self.num_vehicles = vehicle_data['number']  # 车辆数量
+        self.capacity = vehicle_data['capacity']  # 车辆容量
+
+        # 按节点排列的数组
+        self.ids = np.asarray(columns['id'], dtype=np.int64)
+        self.x = np.asarray(columns['x'], dtype=np.float64)
+        self.y = np.asarray(columns['y'], dtype=np.float64)
+        self.demand = np.asarray(columns['demand'], dtype=np.float64)
+        self.ready_time = np.asarray(columns['ready_time'], dtype=np.float64)
+        self.due_date = np.asarray(columns['due_date'], dtype=np.float64)
+        self.service_time = np.asarray(columns['service_time'], dtype=np.float64)
+
+        # 距离矩阵, 行驶时间与距离相等
+        self.distance = self.distance_matrix(self.x, self.y)
+        self.travel_time = self.distance
+
+        # 可行弧矩阵, 每个算例只计算一次; 弧列表, 前驱/后继与大M在首次访问时才生成,
+        # 只使用数组的求解器(ALNS, 分支定价)在1000客户的算例上不会构建O(n^2)个Python对象
+        self.arc_mask = self.feasible_arc_mask()
+        self._arcs = None
+        self._successors = None
+        self._predecessors = None
+        self._big_m = None
+        self.frozen = False
+
+        # 负载变量上下界: 离开节点i时的负载在[demand_i, capacity]内, depot出发时负载为0
+        self.load_lb = self.demand.copy()
+        self.load_ub = np.full(self.n, float(self.capacity))
+        self.load_ub[0] = 0.0
+
+    @property
+    def arcs(self):
+        """
+        可行弧列表[(i, j), ...], 按行优先顺序
+        """
+        if self._arcs is None:
+            arcs = list(zip(*(idx.tolist() for idx in np.nonzero(self.arc_mask))))
+            self._arcs = tuple(arcs) if self.frozen else arcs
+        return self._arcs
+
+    @property
+    def successors(self):
+        """
+        每个节点的可行后继
+        """
+        if self._successors is None:
+            successors = [np.flatnonzero(row).tolist() for row in self.arc_mask]
+            self._successors = self.read_only_lists(successors) if self.frozen else successors
+        return self._successors
+
+    @property
+    def predecessors(self):
+        """
+        每个节点的可行前驱
+        """
+        if self._predecessors is None:
+            predecessors = [np.flatnonzero(col).tolist() for col in self.arc_mask.T]
+            self._predecessors = self.read_only_lists(predecessors) if self.frozen else predecessors
+        return self._predecessors
+
+    @property
+    def load_big_m(self):
+        """
+        负载传播约束的逐弧大M矩阵
+        """
+        return self.lazy_big_m()[0]
+
+    @property
+    def time_big_m(self):
+        """
+        时间传播约束的逐弧大M矩阵
+        """
+        return self.lazy_big_m()[1]
+
+    def lazy_big_m(self):
+        """
+        首次访问时计算大M, 已冻结的算例上同样设为只读
+        """
+        if self._big_m is None:
+            big_m = self.big_m()
+            if self.frozen:
+                for value in big_m:
+                    value.flags.writeable = False
+            self._big_m = big_m
+        return self._big_m
+
+    def freeze(self):
+        """
+        把算例设为只读: 所有数组不可写, 车辆数据为只读映射, 以便在多个模型之间共享同一对象;
+        已构建的弧列表, 前驱/后继与客户数据转为元组与只读映射, 冻结后才构建的在首次访问时同样处理
+        :return: self
+        """
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        if self._big_m is not None:
+            for value in self._big_m:
+                value.flags.writeable = False
+        if self._arcs is not None:
+            self._arcs = tuple(self._arcs)
+        if self._successors is not None:
+            self._successors = self.read_only_lists(self._successors)
+        if self._predecessors is not None:
+            self._predecessors = self.read_only_lists(self._predecessors)
+        if self._customer_data is not None:
+            self._customer_data = self.read_only_records(self._customer_data)
+        self.vehicle_data = MappingProxyType(dict(self.vehicle_data))
+        self.frozen = True
+        return self
+
+    @staticmethod
+    def read_only_lists(lists):
+        """
+        嵌套列表 -> 嵌套元组
+        """
+        return tuple(tuple(values) for values in lists)
+
+    @staticmethod
+    def read_only_records(records):
+        """
+        客户字典列表 -> 只读映射的元组
+        """
+        return tuple(MappingProxyType(dict(record)) for record in records)
+
+    @staticmethod
+    def distance_matrix(x, y):
+        """
+        向量化计算欧氏距离矩阵
+        :param x: 横坐标数组
+        :param y: 纵坐标数组
+        :return: n*n距离矩阵
+        """
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        return np.hypot(dx, dy)
+
+    def feasible_arc_mask(self):
+        """
+        计算可行弧矩阵, 以下弧在任何可行解中都不会被使用:
+        1. 自环 i -> i
+        2. 时间窗不可行: ready_i + service_i + t_ij > due_j
+        3. 容量不可行: demand_i + demand_j > capacity
+        返回depot的弧不受时间窗约束, 只排除自环
+        :return: n*n布尔矩阵, True表示弧(i, j)可行
+        """
+        earliest = self.ready_time + self.service_time  # 最早离开时间
+        time_ok = earliest[:, None] + self.travel_time <= self.due_date[None, :]
+        load_ok = self.demand[:, None] + self.demand[None, :] <= self.capacity
+        mask = time_ok & load_ok
+        mask[:, 0] = True  # 返回depot的弧
+        np.fill_diagonal(mask, False)
+        return mask
+
+    def big_m(self):
+        """
+        由变量上下界计算传播约束 v_j >= v_i + delta_ij - M_ij * (1 - x_ij) 的逐弧大M:
+        M_ij = max(0, ub_i + delta_ij - lb_j), 即x_ij = 0时约束恰好不起作用的最小值
+        负载: M_ij = max(0, load_ub_i + demand_j - load_lb_j)
+        时间: M_ij = max(0, due_i + service_i + t_ij - ready_j)
+        M_ij = 0 时约束已被上下界蕴含
+        :return: (负载大M矩阵, 时间大M矩阵)
+        """
+        load_big_m = np.maximum(0.0, self.load_ub[:, None] + self.demand[None, :] - self.load_lb[None, :])
+        time_big_m = np.maximum(0.0, (self.due_date + self.service_time)[:, None]
+                                + self.travel_time - self.ready_time[None, :])
+        return load_big_m, time_big_m
+
+    def route_schedule(self, route):
+        """
+        沿路线计算每个节点的开始服务时间与离开时的负载
+        :param route: 节点序列, 如[0, 5, 3, 0]
+        :return: (开始服务时间列表, 负载列表), 与route一一对应
+        """
+        arrival = [self.ready_time[route[0]]]
+        load = [self.demand[route[0]]]
+        for i, j in zip(route[:-1], route[1:]):
+            arrival.append(max(self.ready_time[j], arrival[-1] + self.service_time[i] + self.travel_time[i, j]))
+            load.append(load[-1] + self.demand[j])
+        return arrival, load
@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+
+from read.Read import Read
+
+
+class InstanceRegistry:
+    """
+    算例注册表
+    目录只在创建时遍历一次, 算例在首次访问时才解析, 按LRU策略最多保留max_size个Instance;
+    返回的Instance是只读的, 可以在Model, DrawMap与demo.VRPTWSolver之间共享
+    """
+    _shared = {}  # 按目录共享的注册表
+    _shared_lock = threading.Lock()
+
+    def __init__(self, data_path, max_size=16, cache_dir=None):
+        """
+        :param data_path: 算例目录
+        :param max_size: 最多同时保留的算例数
+        :param cache_dir: 解析缓存目录, 默认为算例文件所在目录下的.cache
+        """
+        self.data_path = data_path
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.file_paths = Read(data_path).file_paths  # 算例路径, 只遍历一次目录
+        self.paths = {self.name(path): path for path in self.file_paths}  # 算例名 -> 路径
+        self.instances = OrderedDict()  # 路径 -> Instance, 按最近访问排序
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls, data_path, max_size=16, cache_dir=None):
+        """
+        返回目录对应的进程内共享注册表, 不存在时创建
+        """
+        key = os.path.abspath(data_path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(data_path, max_size, cache_dir)
+            return cls._shared[key]
+
+    @staticmethod
+    def name(path):
+        """
+        算例名, 即不含扩展名的文件名, 如C101
+        """
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def names(self):
+        return sorted(self.paths)
+
+    def path(self, key):
+        """
+        算例名或路径 -> 路径
+        """
+        if key in self.paths:
+            return self.paths[key]
+        if os.path.isfile(key):
+            return key
+        raise KeyError(f"算例 {key} 不存在于路径 {self.data_path} 中。")
+
+    def get(self, key):
+        """
+        获取算例, 未加载时解析并加入缓存, 超出容量时淘汰最久未访问的算例
+        :param key: 算例名(如'C101')或算例文件路径
+        :return: 只读的Instance
+        """
+        path = self.path(key)
+        with self.lock:
+            if path in self.instances:
+                self.instances.move_to_end(path)
+                self.hits += 1
+                return self.instances[path]
+        # 解析不持有锁, 其他线程可以同时访问已加载的算例
+        instance = Read.load_instance(path, self.cache_dir).freeze()
+        with self.lock:
+            if path in self.instances:
+                # 其他线程已加载同一算例, 返回先加载的对象以保证共享
+                self.instances.move_to_end(path)
+                return self.instances[path]
+            self.misses += 1
+            self.instances[path] = instance
+            while len(self.instances) > self.max_size:
+                self.instances.popitem(last=False)
+            return instance
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self.paths or key in self.file_paths
+
+    def __len__(self):
+        return len(self.file_paths)
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def clear(self):
+        with self.lock:
+            self.instances.clear()
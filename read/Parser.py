@@ -0,0 +1,149 @@
+import hashlib
+import os
+from array import array
+
+import numpy as np
+
+
+class Parser:
+    """
+    算例文件的单遍解析器
+    逐行流式读取Solomon与Gehring-Homberger格式文件, 直接得到按列存储的NumPy数组, 不再为每个客户构建字典;
+    解析结果以文件内容的哈希为键缓存为.npy二进制文件, 重复运行时跳过文本解析
+    """
+    COLUMNS = ('id', 'x', 'y', 'demand', 'ready_time', 'due_date', 'service_time')  # 列名, 与客户字典的键一致
+    CACHE_DIR = '.cache'  # 默认缓存目录名, 位于算例文件所在目录下
+    CHUNK_SIZE = 1 << 20  # 计算哈希时每次读取的字节数
+
+    def __init__(self, cache_dir=None, use_cache=True):
+        """
+        :param cache_dir: 缓存目录, 默认为算例文件所在目录下的.cache
+        :param use_cache: 是否使用缓存
+        """
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+
+    def load(self, instance_path):
+        """
+        读取算例, 缓存命中时直接加载数组
+        :param instance_path: 算例文件路径
+        :return: (车辆数据, 列数组字典)
+        """
+        if not self.use_cache:
+            return self.parse_file(instance_path)
+
+        cache_path = self.cache_path(instance_path, self.digest(instance_path))
+        if os.path.isfile(cache_path):
+            try:
+                return self.read_cache(cache_path)
+            except (OSError, ValueError, IndexError):
+                pass  # 缓存损坏时重新解析
+        vehicle_data, columns = self.parse_file(instance_path)
+        self.write_cache(cache_path, vehicle_data, columns)
+        return vehicle_data, columns
+
+    @classmethod
+    def digest(cls, instance_path):
+        """
+        分块计算文件内容的哈希, 不把整个文件读入内存
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(instance_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(cls.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def cache_path(self, instance_path, digest):
+        """
+        缓存文件路径: <缓存目录>/<算例名>-<内容哈希>.npy, 文件内容变化后自动失效
+        """
+        cache_dir = self.cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(instance_path)), self.CACHE_DIR)
+        name = os.path.splitext(os.path.basename(instance_path))[0]
+        return os.path.join(cache_dir, f"{name}-{digest}.npy")
+
+    @classmethod
+    def parse_file(cls, instance_path):
+        """
+        逐行流式解析算例文件, 不使用readlines()
+        """
+        with open(instance_path, 'rb') as file:
+            return cls.parse_lines(file)
+
+    @classmethod
+    def parse(cls, content):
+        """
+        解析已读入内存的文件内容
+        :param content: 文件内容(bytes)
+        :return: (车辆数据, 列数组字典)
+        """
+        return cls.parse_lines(content.splitlines())
+
+    @classmethod
+    def parse_lines(cls, lines):
+        """
+        单遍解析行迭代器, Solomon(100客户)与Gehring-Homberger(200-1000客户)格式相同, 不依赖表头所在的行号
+        只有2个数值的行为车辆数据(数量, 容量), 有7个数值的行为客户数据, 其余行(文件名, 表头, 空行)跳过
+        客户数据逐个写入紧凑的double数组, 不保留中间的字符串列表
+        due_date沿用原有约定, 为截止时间加服务时间
+        :param lines: 行迭代器, 如以'rb'打开的文件对象
+        :return: (车辆数据, 列数组字典)
+        """
+        vehicle_data = {}
+        values = array('d')
+        for line in lines:
+            parts = line.split()
+            if len(parts) == 7 and parts[0].isdigit():
+                values.extend(map(float, parts))
+            elif len(parts) == 2 and not vehicle_data and parts[0].isdigit():
+                vehicle_data['number'] = int(parts[0])
+                vehicle_data['capacity'] = int(parts[1])
+
+        if not vehicle_data or not values:
+            raise ValueError("算例文件中缺少车辆数据或客户数据。")
+
+        table = np.frombuffer(values, dtype=np.float64).reshape(-1, 7)
+        columns = {name: table[:, c].copy() for c, name in enumerate(cls.COLUMNS)}
+        columns['id'] = columns['id'].astype(np.int64)
+        columns['due_date'] += columns['service_time']
+        return vehicle_data, columns
+
+    @classmethod
+    def read_cache(cls, cache_path):
+        """
+        读取缓存, 缓存为(n + 1) * 7的float64表, 第0行前两列为车辆数量与容量, 其余各行为客户数据
+        """
+        table = np.load(cache_path)
+        number, capacity = int(table[0, 0]), int(table[0, 1])
+        columns = {name: table[1:, c] for c, name in enumerate(cls.COLUMNS)}
+        columns['id'] = columns['id'].astype(np.int64)
+        return {'number': number, 'capacity': capacity}, columns
+
+    @classmethod
+    def write_cache(cls, cache_path, vehicle_data, columns):
+        """
+        写入缓存, 先写临时文件再替换, 避免多进程同时写入时读到不完整的文件
+        """
+        table = np.zeros((len(columns['id']) + 1, len(cls.COLUMNS)))
+        table[0, :2] = vehicle_data['number'], vehicle_data['capacity']
+        for c, name in enumerate(cls.COLUMNS):
+            table[1:, c] = columns[name]
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as file:
+                np.save(file, table)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass  # 目录不可写时不使用缓存
+
+    @staticmethod
+    def records(columns):
+        """
+        列数组 -> 客户字典列表, 与Read.read_instance原有的返回格式一致
+        """
+        lists = {name: columns[name].tolist() for name in Parser.COLUMNS}
+        n = len(lists['id'])
+        return [{name: int(lists[name][i]) if float(lists[name][i]).is_integer() else lists[name][i]
+                 for name in Parser.COLUMNS} for i in range(n)]
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from gurobipy import GRB
+
+
+class ResultStore:
+    """
+    求解结果库
+    每个结果是solutions.jsonl中的一行, 只追加不修改; index.json记录每个键最新结果的字节偏移,
+    重新加载时只读取需要的行. 键为 算例内容哈希:配置哈希, 同一算例换了文件名或路径仍能命中,
+    配置(模型形式, 建模参数, 时间限制等)不同的结果互不覆盖
+    """
+    SOLUTIONS = 'solutions.jsonl'
+    INDEX = 'index.json'
+
+    def __init__(self, directory='result/store'):
+        """
+        :param directory: 结果库目录
+        """
+        self.directory = directory
+        self.solutions_path = os.path.join(directory, self.SOLUTIONS)
+        self.index_path = os.path.join(directory, self.INDEX)
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.index = self.load_index()  # 键 -> 字节偏移
+
+    @staticmethod
+    def config_digest(config):
+        """
+        配置字典的哈希, 键的顺序不影响结果
+        """
+        text = json.dumps(config or {}, sort_keys=True, default=str)
+        return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+    @classmethod
+    def key(cls, instance, config=None):
+        return f"{instance.digest()}:{cls.config_digest(config)}"
+
+    def load_index(self):
+        """
+        读取索引; 索引缺失或落后于结果文件(如上次写索引前中断)时扫描结果文件重建
+        """
+        size = os.path.getsize(self.solutions_path) if os.path.isfile(self.solutions_path) else 0
+        if os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path) as file:
+                    data = json.load(file)
+                if data.get('size') == size:
+                    return data['offsets']
+            except (OSError, ValueError, KeyError):
+                pass
+        return self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        扫描结果文件重建索引, 同一个键以最后一行为准
+        """
+        offsets = {}
+        if os.path.isfile(self.solutions_path):
+            with open(self.solutions_path, 'rb') as file:
+                offset = 0
+                for line in file:
+                    try:
+                        offsets[json.loads(line)['key']] = offset
+                    except (ValueError, KeyError):
+                        pass  # 跳过中断时写了一半的行
+                    offset += len(line)
+        self.index = offsets
+        self.save_index()
+        return offsets
+
+    def save_index(self):
+        """
+        原子地写入索引
+        """
+        size = os.path.getsize(self.solutions_path) if os.path.isfile(self.solutions_path) else 0
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({'size': size, 'offsets': self.index}, file)
+        os.replace(temp_path, self.index_path)
+
+    def put(self, instance, config, record):
+        """
+        追加一条结果
+        :param instance: 算例
+        :param config: 配置字典, 如{'model': 'three_index', 'time_limit': 300}
+        :param record: 结果字典, 包含routes, arrival, load, objective, bound, gap, runtime, status等
+        :return: 写入的记录
+        """
+        record = dict(record, key=self.key(instance, config), config=config, saved_at=time.time())
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        with self.lock:
+            with open(self.solutions_path, 'ab') as file:
+                offset = file.tell()
+                file.write(line)
+            self.index[record['key']] = offset
+            self.save_index()
+        return record
+
+    def put_model(self, instance, config, model, name=None):
+        """
+        由求解后的Model/TwoIndexModel生成结果并追加
+        :param name: 算例名, 只用于阅读
+        :return: 写入的记录, 模型无解时返回None
+        """
+        gurobi_model = model.model
+        if gurobi_model.SolCount == 0:
+            return None
+        routes = model.extract_routes()
+        record = {'instance': name,
+                  'routes': [route['route'] for route in routes.values()],
+                  'arrival': [[round(a, 6) for a in route['arrival']] for route in routes.values()],
+                  'load': [[round(q, 6) for q in route['load']] for route in routes.values()],
+                  **model.objective_summary(),
+                  'runtime': gurobi_model.Runtime,
+                  'status': gurobi_model.status}
+        return self.put(instance, config, record)
+
+    def get(self, instance, config=None):
+        """
+        读取算例在给定配置下最新的结果
+        :return: 结果字典, 不存在时返回None
+        """
+        offset = self.index.get(self.key(instance, config))
+        if offset is None:
+            return None
+        with open(self.solutions_path, 'rb') as file:
+            file.seek(offset)
+            return json.loads(file.readline())
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def solved(self, instance, config=None):
+        """
+        算例在给定配置下是否已求得最优解(status为GRB.OPTIMAL), 可以跳过重新求解
+        """
+        record = self.get(instance, config)
+        return record is not None and record['status'] == GRB.OPTIMAL
+
+    def routes(self, instance, config=None):
+        """
+        已保存的路线, 可直接传给Model.warm_start
+        :return: 路线列表, 不存在时返回None
+        """
+        record = self.get(instance, config)
+        return None if record is None else record['routes']